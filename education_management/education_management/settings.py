@@ -127,6 +127,86 @@ STATICFILES_DIRS = [
 ]
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# School calendar: the academic year starts on the 1st of this month,
+# the week mask marks working days Monday..Sunday, and public holidays
+# (YYYY-MM-DD) are closed for every school
+ACADEMIC_YEAR_START_MONTH = 4
+WORKING_WEEKMASK = "1111110"
+PUBLIC_HOLIDAYS = [
+    "2025-01-26",
+    "2025-08-15",
+    "2025-10-02",
+    "2026-01-26",
+    "2026-08-15",
+    "2026-10-02",
+]
+
+# Class timetable structure: grades taught, sections per grade and
+# periods per day, each either one number or a {grade: number} dict.
+# Working days come from WORKING_WEEKMASK.
+SCHOOL_GRADES = list(range(1, 11))
+SCHOOL_SECTIONS = 4
+SCHOOL_PERIODS = {grade: 5 if grade <= 4 else 8 for grade in SCHOOL_GRADES}
+
+# Worker threads for background exam/class timetable jobs
+TIMETABLE_JOB_WORKERS = 2
+
+# Worker processes for Step 2 of class timetable generation; classes
+# are split across them by grade band. 1 keeps it in-process, which is
+# faster for a single campus with a few sections per grade.
+CLASS_TIMETABLE_PROCESSES = 1
+
+# Book teachers with the matching solver (users/timetable_solver.py),
+# which may move lessons between periods of a day to keep class and
+# teacher timetables consistent, instead of the next-free-period fallback
+CLASS_TIMETABLE_SOLVER = False
+
+# Seed for class teacher picks and the Saturday shuffle; None draws
+# fresh choices on every upload of a new teachers CSV
+CLASS_TIMETABLE_SEED = None
+
+# Rows per INSERT when saving a generated class timetable as slots
+TIMETABLE_SLOT_BATCH_SIZE = 1000
+
+# Rows per INSERT .. ON CONFLICT when upserting bulk attendance
+ATTENDANCE_BATCH_SIZE = 5000
+
+# Bearer token that school systems send to the bulk attendance API
+# ("Authorization: Bearer <token>"); None turns the API off
+ATTENDANCE_API_TOKEN = os.environ.get("ATTENDANCE_API_TOKEN")
+
+# Skipped CSV rows listed back to the uploader
+ATTENDANCE_ERRORS_SHOWN = 20
+
+# Lowest percentage for each exam grade; anything below E is an F
+GRADE_BOUNDARIES = {"A": 90, "B": 75, "C": 60, "D": 45, "E": 33}
+
+# Marks are out of this unless an import says otherwise
+EXAM_MAX_MARKS = 100
+
+# Rows per INSERT/UPDATE when importing exam marks
+MARKS_IMPORT_BATCH_SIZE = 1000
+
+# Exam timetable uploads are read this many classes at a time
+EXAM_TIMETABLE_CHUNK_SIZE = 500
+
+# Rows per page when showing a generated exam timetable
+EXAM_TIMETABLE_PAGE_SIZE = 50
+
+# Seed for exam session assignment, so identical uploads give identical
+# timetables and can be served from the cache
+EXAM_TIMETABLE_SEED = 0
+
+# Generated exam timetables are evicted once older than the max age (in
+# seconds), or oldest first while the folder is larger than max bytes
+EXAM_TIMETABLE_CACHE_MAX_AGE = 30 * 24 * 60 * 60
+EXAM_TIMETABLE_CACHE_MAX_BYTES = 500 * 1024 * 1024
+
+# Compiled teacher rosters are evicted the same way
+TEACHER_ROSTER_CACHE_MAX_AGE = 30 * 24 * 60 * 60
+TEACHER_ROSTER_CACHE_MAX_BYTES = 50 * 1024 * 1024
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
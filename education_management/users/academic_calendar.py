@@ -0,0 +1,79 @@
+from datetime import date
+from functools import lru_cache
+import numpy as np
+from education_management import settings
+
+
+# Academic year a day belongs to, named by the year it starts in
+def academic_year_of(day):
+    if day.month >= settings.ACADEMIC_YEAR_START_MONTH:
+        return day.year
+    return day.year - 1
+
+
+# Working days of one academic year. Weekly offs come from WORKING_WEEKMASK,
+# public holidays from PUBLIC_HOLIDAYS and school closures from the
+# blackout dates, all excluded in one NumPy business-day pass.
+class AcademicCalendar:
+    def __init__(self, year, blackout_dates=()):
+        self.year = year
+        self.start = np.datetime64(
+            date(year, settings.ACADEMIC_YEAR_START_MONTH, 1)
+        )
+        self.end = np.datetime64(
+            date(year + 1, settings.ACADEMIC_YEAR_START_MONTH, 1)
+        )
+        closed_dates = np.array(
+            list(settings.PUBLIC_HOLIDAYS) + list(blackout_dates),
+            dtype="datetime64[D]"
+        )
+        self.busdaycalendar = np.busdaycalendar(
+            weekmask=settings.WORKING_WEEKMASK,
+            holidays=closed_dates
+        )
+        days = np.arange(self.start, self.end)
+        self.working_days = days[
+            np.is_busday(days, busdaycal=self.busdaycalendar)
+        ]
+
+    # Working days between two dates (inclusive) within this year
+    def working_days_between(self, start_date, end_date):
+        first = np.searchsorted(
+            self.working_days,
+            np.datetime64(start_date, "D"),
+            side="left"
+        )
+        last = np.searchsorted(
+            self.working_days,
+            np.datetime64(end_date, "D"),
+            side="right"
+        )
+        return self.working_days[first:last]
+
+
+# Calendars are built once per academic year and set of blackout dates
+# and then shared by every request
+@lru_cache(maxsize=64)
+def get_academic_calendar(year, blackout_dates=()):
+    return AcademicCalendar(year, blackout_dates)
+
+
+# Working days between two dates (inclusive), possibly spanning academic
+# years, as datetime64[D]
+def working_days(start_date, end_date, blackout_dates=()):
+    blackout_dates = tuple(sorted(str(d) for d in blackout_dates))
+    start_date = np.datetime64(start_date, "D").astype(object)
+    end_date = np.datetime64(end_date, "D").astype(object)
+    days = [
+        get_academic_calendar(year, blackout_dates).working_days_between(
+            start_date,
+            end_date
+        )
+        for year in range(
+            academic_year_of(start_date),
+            academic_year_of(end_date) + 1
+        )
+    ]
+    if not days:
+        return np.array([], dtype="datetime64[D]")
+    return np.concatenate(days)
@@ -0,0 +1,113 @@
+import codecs
+import csv
+import io
+import time
+from datetime import date
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from education_management import settings
+from users.attendance_rollups import (
+    refresh_attendance_rollups,
+    rollup_keys
+)
+from users.models import Attendance, Student
+
+
+ATTENDANCE_KEY = ["student", "date_of_attendance", "class_attended"]
+PRESENT_VALUES = {"1", "true", "yes", "y", "present", "p"}
+
+
+# Upsert (student_id, class_id, date, is_present) records in
+# bulk_create batches. An existing row for the same student, day and
+# class is overwritten (and undeleted) instead of raising, so uploading
+# a day twice is safe. The whole upload is one transaction.
+def upsert_attendance(records, batch_size=None):
+    batch_size = batch_size or settings.ATTENDANCE_BATCH_SIZE
+    started = time.perf_counter()
+    rows = 0
+    # Keyed on the unique fields: one INSERT .. ON CONFLICT can't touch
+    # the same row twice, so a repeated record in a batch replaces the
+    # earlier one
+    batch = {}
+    with transaction.atomic():
+        for student_id, class_id, day, is_present in records:
+            batch[(student_id, day, class_id)] = Attendance(
+                student_id=student_id,
+                class_attended_id=class_id,
+                date_of_attendance=day,
+                is_present=is_present
+            )
+            rows += 1
+            if len(batch) >= batch_size:
+                _write_batch(batch.values())
+                batch = {}
+        if batch:
+            _write_batch(batch.values())
+    seconds = time.perf_counter() - started
+    return {
+        "rows": rows,
+        "seconds": round(seconds, 4),
+        "rows_per_second": round(rows / seconds) if seconds else rows
+    }
+
+
+# bulk_create sends no signals, so the batch's rollups are refreshed
+# here, in the same transaction
+def _write_batch(attendances):
+    attendances = list(attendances)
+    Attendance.objects.bulk_create(
+        attendances,
+        update_conflicts=True,
+        unique_fields=ATTENDANCE_KEY,
+        update_fields=["is_present", "is_deleted", "updated_at"]
+    )
+    refresh_attendance_rollups(*rollup_keys(attendances))
+
+
+# One class-day: every student enrolled in the class is marked, present
+# if their roll number is listed and absent otherwise
+def class_day_records(class_id, day, present_roll_numbers):
+    present = {int(roll_number) for roll_number in present_roll_numbers}
+    students = Student.active.filter(
+        class_enrolled_id=class_id
+    ).values_list("id", "roll_number")
+    for student_id, roll_number in students:
+        yield student_id, class_id, day, roll_number in present
+
+
+# Stream an attendance CSV (class_id, roll_number, date_of_attendance,
+# is_present) as records for upsert_attendance. Roll numbers are looked
+# up once per class. Rows naming an unknown class or roll number, or an
+# unreadable date, are skipped and reported in `errors` as
+# (line, message).
+def read_attendance_csv(csv_file, errors):
+    if not isinstance(csv_file, io.TextIOBase):
+        # Uploaded files iterate as lines of bytes
+        csv_file = codecs.iterdecode(csv_file, "utf-8-sig")
+    students_by_class = {}
+    for line, row in enumerate(csv.DictReader(csv_file), start=2):
+        try:
+            class_id = row["class_id"].strip()
+            if class_id not in students_by_class:
+                students_by_class[class_id] = dict(
+                    Student.active.filter(
+                        class_enrolled_id=class_id
+                    ).values_list("roll_number", "id")
+                )
+            student_id = students_by_class[class_id].get(
+                int(row["roll_number"])
+            )
+            if student_id is None:
+                raise ValueError(
+                    f"No student with roll number {row['roll_number']} "
+                    f"in class {class_id}"
+                )
+            day = date.fromisoformat(row["date_of_attendance"].strip())
+        except ValidationError as e:
+            errors.append((line, "; ".join(e.messages)))
+            continue
+        except (KeyError, ValueError, AttributeError) as e:
+            errors.append((line, str(e)))
+            continue
+        is_present = row.get("is_present", "").strip().lower() in PRESENT_VALUES
+        yield student_id, class_id, day, is_present
@@ -0,0 +1,274 @@
+from datetime import date
+from functools import reduce
+from operator import or_
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.functions import TruncMonth
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from users.models import (
+    Attendance,
+    ClassDailyAttendance,
+    StudentMonthlyAttendance
+)
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def next_month(month):
+    if month.month == 12:
+        return date(month.year + 1, 1, 1)
+    return date(month.year, month.month + 1, 1)
+
+
+# Recount the given (class_id, date) and (student_id, month start) keys
+# from their raw rows and upsert the rollups. Each key covers at most a
+# class-day or a student-month of rows, so the cost follows the size of
+# the write, not of the attendance table. Counting again instead of
+# adding deltas keeps overwrites and soft deletes correct. Ids may be
+# UUIDs or strings.
+#
+# The rollup rows are locked (created first if missing) before counting,
+# so two uploads touching the same class-day take turns: under READ
+# COMMITTED the second one counts after the first has committed, instead
+# of both counting without the other's rows and the last write winning.
+# Keys left without any active rows lose their rollup row, so the tables
+# hold exactly what rebuild_attendance_rollups would.
+@transaction.atomic
+def refresh_attendance_rollups(class_days, student_months):
+    class_days = {(str(class_id), day) for class_id, day in class_days}
+    student_months = {
+        (str(student_id), month) for student_id, month in student_months
+    }
+    if class_days:
+        _refresh_class_days(class_days)
+    if student_months:
+        _refresh_student_months(student_months)
+
+
+# Insert any missing rollup rows for `keys` (tuples of the values of
+# `fields`), then lock them all. Both steps go in key order, so
+# concurrent refreshes of overlapping keys can't deadlock.
+def _lock_rollups(model, fields, keys):
+    keys = sorted(keys)
+    model.objects.bulk_create(
+        [model(**dict(zip(fields, key))) for key in keys],
+        ignore_conflicts=True
+    )
+    list(
+        model.objects.select_for_update().filter(**{
+            f"{field}__in": {key[index] for key in keys}
+            for index, field in enumerate(fields)
+        }).order_by(*fields).values_list("id", flat=True)
+    )
+
+
+def _aggregates():
+    return {
+        "total": Count("id"),
+        "present": Count("id", filter=Q(is_present=True))
+    }
+
+
+# Delete the (locked) rollup rows for `keys` that no longer count any
+# attendance
+def _delete_empty(model, fields, keys):
+    if keys:
+        model.objects.filter(reduce(or_, (
+            Q(**dict(zip(fields, key))) for key in keys
+        ))).delete()
+
+
+def _refresh_class_days(class_days):
+    _lock_rollups(
+        ClassDailyAttendance,
+        ("class_attended_id", "date_of_attendance"),
+        class_days
+    )
+    counts = {
+        (str(row["class_attended_id"]), row["date_of_attendance"]): row
+        for row in Attendance.active.filter(
+            class_attended_id__in={class_id for class_id, _ in class_days},
+            date_of_attendance__in={day for _, day in class_days}
+        ).values("class_attended_id", "date_of_attendance").annotate(
+            **_aggregates()
+        )
+    }
+    ClassDailyAttendance.objects.bulk_create(
+        [
+            ClassDailyAttendance(
+                class_attended_id=class_id,
+                date_of_attendance=day,
+                present=counts[class_id, day]["present"],
+                total=counts[class_id, day]["total"]
+            )
+            for class_id, day in class_days & counts.keys()
+        ],
+        update_conflicts=True,
+        unique_fields=["class_attended", "date_of_attendance"],
+        update_fields=["present", "total", "updated_at"]
+    )
+    _delete_empty(
+        ClassDailyAttendance,
+        ("class_attended_id", "date_of_attendance"),
+        class_days - counts.keys()
+    )
+
+
+def _refresh_student_months(student_months):
+    _lock_rollups(
+        StudentMonthlyAttendance,
+        ("student_id", "month"),
+        student_months
+    )
+    months = {month for _, month in student_months}
+    counts = {
+        (str(row["student_id"]), row["month"]): row
+        for row in Attendance.active.filter(
+            student_id__in={student_id for student_id, _ in student_months},
+            date_of_attendance__gte=min(months),
+            date_of_attendance__lt=next_month(max(months))
+        ).annotate(
+            month=TruncMonth("date_of_attendance")
+        ).values("student_id", "month").annotate(**_aggregates())
+    }
+    StudentMonthlyAttendance.objects.bulk_create(
+        [
+            StudentMonthlyAttendance(
+                student_id=student_id,
+                month=month,
+                present=counts[student_id, month]["present"],
+                total=counts[student_id, month]["total"]
+            )
+            for student_id, month in student_months & counts.keys()
+        ],
+        update_conflicts=True,
+        unique_fields=["student", "month"],
+        update_fields=["present", "total", "updated_at"]
+    )
+    _delete_empty(
+        StudentMonthlyAttendance,
+        ("student_id", "month"),
+        student_months - counts.keys()
+    )
+
+
+# Rollup keys touched by writing these attendance rows
+def rollup_keys(attendances):
+    class_days = set()
+    student_months = set()
+    for attendance in attendances:
+        class_days.add((
+            attendance.class_attended_id,
+            attendance.date_of_attendance
+        ))
+        student_months.add((
+            attendance.student_id,
+            month_start(attendance.date_of_attendance)
+        ))
+    return class_days, student_months
+
+
+# Rebuild every rollup from the raw table, e.g. for rows written before
+# the rollups existed or by QuerySet.update(), which skips the hooks
+@transaction.atomic
+def rebuild_attendance_rollups(batch_size=5000):
+    ClassDailyAttendance.objects.all().delete()
+    StudentMonthlyAttendance.objects.all().delete()
+    keys = Attendance.active.values_list(
+        "class_attended_id",
+        "student_id",
+        "date_of_attendance"
+    ).distinct().order_by("date_of_attendance")
+    class_days = set()
+    student_months = set()
+    for class_id, student_id, day in keys.iterator(chunk_size=batch_size):
+        class_days.add((class_id, day))
+        student_months.add((student_id, month_start(day)))
+        if len(student_months) >= batch_size:
+            refresh_attendance_rollups(class_days, student_months)
+            class_days = set()
+            student_months = set()
+    refresh_attendance_rollups(class_days, student_months)
+
+
+def _summary(rollup, **keys):
+    present = rollup.present if rollup else 0
+    total = rollup.total if rollup else 0
+    return dict(
+        keys,
+        present=present,
+        total=total,
+        percentage=round(100 * present / total, 2) if total else None
+    )
+
+
+# Dashboard reads. Each is one indexed lookup on a rollup table, at most
+# a month of class-days or a student's months.
+def class_day_attendance(class_id, day):
+    rollup = ClassDailyAttendance.objects.filter(
+        class_attended_id=class_id,
+        date_of_attendance=day
+    ).first()
+    return _summary(rollup, date=day.isoformat())
+
+
+def class_month_attendance(class_id, month):
+    days = ClassDailyAttendance.objects.filter(
+        class_attended_id=class_id,
+        date_of_attendance__gte=month,
+        date_of_attendance__lt=next_month(month)
+    ).order_by("date_of_attendance")
+    summary = _summary(None, month=month.strftime("%Y-%m"))
+    summary["days"] = []
+    for rollup in days:
+        summary["present"] += rollup.present
+        summary["total"] += rollup.total
+        summary["days"].append(
+            _summary(rollup, date=rollup.date_of_attendance.isoformat())
+        )
+    if summary["total"]:
+        summary["percentage"] = round(
+            100 * summary["present"] / summary["total"],
+            2
+        )
+    return summary
+
+
+def student_attendance(student_id, month=None):
+    months = StudentMonthlyAttendance.objects.filter(student_id=student_id)
+    if month:
+        return _summary(
+            months.filter(month=month).first(),
+            month=month.strftime("%Y-%m")
+        )
+    return [
+        _summary(rollup, month=rollup.month.strftime("%Y-%m"))
+        for rollup in months.order_by("month")
+    ]
+
+
+# Single-row writes (admin, save(), delete()). Bulk uploads go through
+# users/attendance.py, which refreshes once per batch instead.
+@receiver(pre_save, sender=Attendance)
+def remember_previous_attendance(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # A row moved to another day or class leaves its old rollups stale
+    instance._previous_attendance = Attendance.objects.filter(
+        pk=instance.pk
+    ).first()
+
+
+@receiver(post_save, sender=Attendance)
+@receiver(post_delete, sender=Attendance)
+def refresh_rollups_for_attendance(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    attendances = [instance]
+    previous = getattr(instance, "_previous_attendance", None)
+    if previous is not None:
+        attendances.append(previous)
+    refresh_attendance_rollups(*rollup_keys(attendances))
@@ -0,0 +1,109 @@
+import hashlib
+import os
+import time
+from education_management import settings
+from users.models import ExamTimeTable
+
+
+# Content address of an exam timetable request: the uploaded CSV bytes,
+# the date range, the seed and any scheduling options that change the
+# result (blackout dates, packing constraints)
+def exam_timetable_cache_key(csv_file, start_date, end_date, seed, **options):
+    digest = hashlib.sha256()
+    for chunk in csv_file.chunks():
+        digest.update(chunk)
+    csv_file.seek(0)
+    digest.update(f"|{start_date}|{end_date}|{seed}".encode())
+    for name, value in sorted(options.items()):
+        if name == "blackout_dates":
+            value = ",".join(sorted(str(d) for d in value))
+        if value:
+            digest.update(f"|{name}={value}".encode())
+    return digest.hexdigest()
+
+
+# Keyword arguments for generate_exam_timetable that reproduce the
+# request an ExamTimeTable row was cached under. Rows saved before the
+# options were recorded were requested with the default seed only.
+def stored_schedule_options(exam_timetable):
+    options = dict(
+        exam_timetable.schedule_options or
+        {"seed": settings.EXAM_TIMETABLE_SEED}
+    )
+    options["blackout_dates"] = tuple(options.get("blackout_dates", ()))
+    return options
+
+
+# Previously generated timetable for a cache key, if its file still exists
+def get_cached_exam_timetable(cache_key):
+    exam_timetables = ExamTimeTable.objects.filter(
+        cache_key=cache_key
+    ).exclude(generated_timetable_csv__isnull=True).exclude(
+        generated_timetable_csv=""
+    )
+    for exam_timetable in exam_timetables:
+        path = os.path.join(
+            settings.MEDIA_ROOT,
+            exam_timetable.generated_timetable_csv.name
+        )
+        if os.path.exists(path):
+            # Bump the access time only, so eviction sees the file as
+            # recently used while its mtime keeps tracking its content
+            os.utime(path, (time.time(), os.path.getmtime(path)))
+            return exam_timetable
+    return None
+
+
+# Delete generated timetables that are too old, then the least recently
+# used ones until the folder fits in max_bytes, and forget them on the
+# ExamTimeTable rows so they are regenerated on the next request. The
+# timetables in `keep` (e.g. the ones just generated) are never evicted.
+# Two jobs can evict at once, so a file the other one removed first is
+# skipped.
+def evict_exam_timetable_cache(
+        max_age=settings.EXAM_TIMETABLE_CACHE_MAX_AGE,
+        max_bytes=settings.EXAM_TIMETABLE_CACHE_MAX_BYTES,
+        keep=()
+    ):
+    cache_dir = os.path.join(settings.MEDIA_ROOT, "exam_timetables")
+    if not os.path.isdir(cache_dir):
+        return []
+
+    files = {
+        entry.name: entry.stat()
+        for entry in os.scandir(cache_dir)
+        if entry.is_file()
+    }
+    # Columnar .npz copies (see timetable_store) go with their CSV
+    entries = sorted(
+        (
+            stat.st_atime,
+            stat.st_size + getattr(files.get(f"{name}.npz"), "st_size", 0),
+            name
+        )
+        for name, stat in files.items()
+        if name.endswith(".csv")
+    )
+    total_bytes = sum(size for _, size, _ in entries)
+    oldest_allowed = time.time() - max_age
+
+    keep = {os.path.basename(str(path)) for path in keep}
+    evicted = []
+    for atime, size, name in entries:
+        if atime >= oldest_allowed and total_bytes <= max_bytes:
+            break
+        if name in keep:
+            continue
+        for file_name in (name, f"{name}.npz"):
+            try:
+                os.remove(os.path.join(cache_dir, file_name))
+            except FileNotFoundError:
+                pass
+        total_bytes -= size
+        evicted.append(f"exam_timetables/{name}")
+
+    if evicted:
+        ExamTimeTable.objects.filter(
+            generated_timetable_csv__in=evicted
+        ).update(generated_timetable_csv=None)
+    return evicted
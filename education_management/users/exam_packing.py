@@ -0,0 +1,239 @@
+from collections import Counter, defaultdict
+import numpy as np
+import pandas as pd
+
+
+SESSIONS = ["Morning", "Afternoon"]
+
+
+class ExamScheduleError(ValueError):
+    prefix = "No exam timetable"
+
+    def __init__(self, conflicts):
+        self.conflicts = conflicts
+        super().__init__(f"{self.prefix}: " + "; ".join(conflicts))
+
+
+# The constraints provably cannot all hold
+class UnsatisfiableScheduleError(ExamScheduleError):
+    prefix = "Exam timetable cannot satisfy the constraints"
+
+
+# The search gave up; another placement might still exist
+class NoScheduleFoundError(ExamScheduleError):
+    prefix = "No exam timetable found"
+
+
+# Packs every class's exams into as few working days as possible.
+#
+# Each exam is placed in a (date, session) slot. Exams of the same class
+# keep their CSV (priority) order and must be at least min_gap_days + 1
+# days apart, a subject is written at most once per date (the rule the
+# default scheduler keeps), and no day may hold more than
+# max_exams_per_day exams across the school (halls and invigilators).
+# Within a day an exam takes the less loaded session, so both halls are
+# used evenly. A first-fit greedy pass, largest classes first, gives a
+# starting window. A local search then empties the last day by moving
+# exams earlier, and if a target slot is blocked it first moves the
+# blocking exam somewhere else. Exams that cannot be placed are reported
+# instead of being allowed to clash.
+class ExamPacker:
+    def __init__(
+            self,
+            date_slots,
+            max_exams_per_day=None,
+            min_gap_days=0,
+            max_iterations=1000
+        ):
+        self.date_slots = np.asarray(date_slots, dtype="datetime64[D]")
+        self.num_days = len(self.date_slots)
+        self.capacity = max_exams_per_day or np.iinfo(np.int64).max
+        self.step = min_gap_days + 1
+        self.min_gap_days = min_gap_days
+        self.max_iterations = max_iterations
+        self.classes = []  # (class_name, subjects) per CSV row
+        self.slots = []  # (day, session) per exam, per class
+        self.on_day = defaultdict(set)  # Day -> {(class, exam)}
+        self.load = np.zeros(self.num_days, dtype=np.int64)
+        self.session_load = np.zeros(
+            (self.num_days, len(SESSIONS)),
+            dtype=np.int64
+        )
+        # Subject -> days it is already written on
+        self.subject_days = defaultdict(
+            lambda: np.zeros(self.num_days, dtype=bool)
+        )
+        self.conflicts = []
+
+    def add_class(self, class_name, subjects):
+        self.classes.append((class_name, list(subjects)))
+
+    def _subject(self, c, i):
+        return self.classes[c][1][i]
+
+    def _day(self, c, i):
+        return self.slots[c][i][0]
+
+    # Days exam i of class c may move to without breaking its gaps
+    def _bounds(self, c, i):
+        slots = self.slots[c]
+        low = slots[i - 1][0] + self.step if i > 0 else 0
+        high = (
+            slots[i + 1][0] - self.step
+            if i + 1 < len(slots)
+            else self.num_days - 1
+        )
+        return low, high
+
+    # First (day, session) in [low, high] with room and without this
+    # subject, taking the day's less loaded session
+    def _first_free_slot(self, subject, low, high):
+        if low > high:
+            return None
+        free = np.flatnonzero(
+            (self.load[low:high + 1] < self.capacity) &
+            ~self.subject_days[subject][low:high + 1]
+        )
+        if not free.size:
+            return None
+        day = low + int(free[0])
+        return day, int(np.argmin(self.session_load[day]))
+
+    def _place(self, c, i, slot):
+        day, session = slot
+        self.slots[c][i] = slot
+        self.on_day[day].add((c, i))
+        self.load[day] += 1
+        self.session_load[day, session] += 1
+        self.subject_days[self._subject(c, i)][day] = True
+
+    def _remove(self, c, i):
+        day, session = self.slots[c][i]
+        self.on_day[day].discard((c, i))
+        self.load[day] -= 1
+        self.session_load[day, session] -= 1
+        self.subject_days[self._subject(c, i)][day] = False
+
+    def _move(self, c, i, slot):
+        self._remove(c, i)
+        self._place(c, i, slot)
+
+    def _check_feasibility(self):
+        for class_name, subjects in self.classes:
+            needed = (len(subjects) - 1) * self.step + 1
+            if subjects and needed > self.num_days:
+                self.conflicts.append(
+                    f"class {class_name} needs {needed} working days for "
+                    f"{len(subjects)} exams with a {self.min_gap_days}-day "
+                    f"gap but only {self.num_days} are available"
+                )
+        total_exams = sum(len(subjects) for _, subjects in self.classes)
+        if total_exams > self.capacity * self.num_days:
+            self.conflicts.append(
+                f"{total_exams} exams do not fit in {self.num_days} days "
+                f"at {self.capacity} exams per day"
+            )
+        # Each class writes a subject at most once, on its own date
+        classes_per_subject = Counter(
+            subject
+            for _, subjects in self.classes
+            for subject in set(subjects)
+        )
+        for subject, count in sorted(classes_per_subject.items()):
+            if count > self.num_days:
+                self.conflicts.append(
+                    f"{subject} is written by {count} classes but only "
+                    f"{self.num_days} dates are available"
+                )
+
+    def _greedy(self):
+        self.slots = [[None] * len(subjects) for _, subjects in self.classes]
+        order = sorted(
+            range(len(self.classes)),
+            key=lambda c: -len(self.classes[c][1])
+        )
+        for c in order:
+            class_name, subjects = self.classes[c]
+            day = 0
+            for i, subject in enumerate(subjects):
+                slot = self._first_free_slot(subject, day, self.num_days - 1)
+                if slot is None:
+                    self.conflicts.append(
+                        f"class {class_name} {subject}: no date left with "
+                        f"room and without {subject} after its previous exam"
+                    )
+                    break
+                self._place(c, i, slot)
+                day = slot[0] + self.step
+
+    # Move exam (c, i) to a day before `before`. If every day in reach is
+    # blocked, move one blocking exam (same day, for capacity, or same
+    # subject and date) to another slot first.
+    def _relocate(self, c, i, before):
+        low, high = self._bounds(c, i)
+        high = min(high, before - 1)
+        subject = self._subject(c, i)
+        slot = self._first_free_slot(subject, low, high)
+        if slot is not None:
+            self._move(c, i, slot)
+            return True
+
+        original = self.slots[c][i]
+        for day in range(low, high + 1):
+            for other, j in list(self.on_day[day]):
+                if other == c:
+                    continue
+                other_slot = self.slots[other][j]
+                self._remove(other, j)
+                slot = self._first_free_slot(subject, day, day)
+                if slot is not None:
+                    self._move(c, i, slot)
+                    other_low, other_high = self._bounds(other, j)
+                    other_new = self._first_free_slot(
+                        self._subject(other, j),
+                        other_low,
+                        min(other_high, before - 1)
+                    )
+                    if other_new is not None:
+                        self._place(other, j, other_new)
+                        return True
+                    self._move(c, i, original)
+                self._place(other, j, other_slot)
+        return False
+
+    def _local_search(self):
+        for _ in range(self.max_iterations):
+            used = np.flatnonzero(self.load)
+            if not used.size:
+                return
+            last = int(used[-1])
+            if not all(
+                self._relocate(c, i, last) for c, i in list(self.on_day[last])
+            ):
+                return
+
+    def solve(self):
+        self._check_feasibility()
+        if self.conflicts:
+            raise UnsatisfiableScheduleError(self.conflicts)
+        self._greedy()
+        if self.conflicts:
+            raise NoScheduleFoundError(self.conflicts)
+        self._local_search()
+        return self.to_dataframe()
+
+    def to_dataframe(self):
+        rows = sorted(
+            (day, session, class_name, subject)
+            for (class_name, subjects), slots in zip(self.classes, self.slots)
+            for subject, (day, session) in zip(subjects, slots)
+        )
+        labels = np.asarray(
+            pd.DatetimeIndex(self.date_slots).strftime("%d-%b-%Y")
+        )
+        return pd.DataFrame({
+            "Date": labels[[day for day, _, _, _ in rows]].tolist(),
+            "Class": [class_name for _, _, class_name, _ in rows],
+            "Subject": [subject for _, _, _, subject in rows],
+            "Session": [SESSIONS[session] for _, session, _, _ in rows],
+        })
@@ -0,0 +1,106 @@
+from bisect import bisect_right
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+from users.academic_calendar import working_days
+
+
+# Working exam days between two dates (inclusive) as NumPy day offsets
+def exam_date_slots(start_date, end_date, blackout_dates=()):
+    return working_days(start_date, end_date, blackout_dates)
+
+
+# Per-subject occupancy of date slot positions. Used slots are kept as
+# sorted runs of consecutive positions, so "next free date for a subject
+# at or after a slot" is a bisect over the runs instead of a scan over
+# every date.
+class DateOccupancyIndex:
+    def __init__(self):
+        self._runs = defaultdict(lambda: ([], []))  # subject -> starts, ends
+
+    def next_free_slot(self, subject, slot):
+        starts, ends = self._runs[subject]
+        k = bisect_right(starts, slot) - 1
+        if k >= 0 and ends[k] >= slot:
+            # Runs are merged, so the slot after a run is always free
+            return ends[k] + 1
+        return slot
+
+    def mark(self, subject, slot):
+        starts, ends = self._runs[subject]
+        k = bisect_right(starts, slot) - 1
+        if k >= 0 and ends[k] >= slot:
+            return  # Already used
+        joins_left = k >= 0 and ends[k] == slot - 1
+        joins_right = k + 1 < len(starts) and starts[k + 1] == slot + 1
+        if joins_left and joins_right:
+            ends[k] = ends[k + 1]
+            del starts[k + 1]
+            del ends[k + 1]
+        elif joins_left:
+            ends[k] = slot
+        elif joins_right:
+            starts[k + 1] = slot
+        else:
+            starts.insert(k + 1, slot)
+            ends.insert(k + 1, slot)
+
+
+# Places each class's exams on the available date slots, using a
+# DateOccupancyIndex for the "subject already written that day" check.
+class ExamScheduler:
+    def __init__(self, date_slots):
+        self.date_slots = np.asarray(date_slots, dtype="datetime64[D]")
+        self.num_slots = len(self.date_slots)
+        self.occupancy = DateOccupancyIndex()
+        self.date_labels = np.asarray(
+            pd.DatetimeIndex(self.date_slots).strftime("%d-%b-%Y")
+        )
+        self._slots = []
+        self._classes = []
+        self._subjects = []
+
+    def schedule_class(self, class_name, subjects):
+        num_subjects = len(subjects)
+        if not num_subjects:
+            return []
+
+        # Calculate gaps dynamically
+        if self.num_slots > num_subjects:
+            gap_days = (self.num_slots - num_subjects) // num_subjects
+        else:
+            gap_days = 0
+
+        positions = []
+        cursor = 0
+        for subject in subjects:
+            if positions:
+                cursor = min(cursor + gap_days, self.num_slots)
+                # First date from the cursor on without this subject;
+                # fall back to the cursor itself if every date clashes
+                free = self.occupancy.next_free_slot(subject, cursor)
+                if free < self.num_slots:
+                    cursor = free
+
+            if cursor < self.num_slots:
+                self.occupancy.mark(subject, cursor)
+                positions.append(cursor)
+                self._classes.append(class_name)
+                self._subjects.append(subject)
+                cursor += 1
+
+        self._slots.extend(positions)
+        return positions
+
+    # Rows scheduled since the last flush, as a DataFrame
+    def flush(self):
+        timetable_df = pd.DataFrame({
+            "Date": self.date_labels[np.asarray(self._slots, dtype=np.int64)],
+            "Class": self._classes,
+            "Subject": self._subjects,
+        })
+        self._slots = []
+        self._classes = []
+        self._subjects = []
+        return timetable_df
@@ -0,0 +1,146 @@
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from django.db import connection, transaction
+from django.utils import timezone
+from education_management import settings
+from users.exam_cache import (
+    evict_exam_timetable_cache,
+    stored_schedule_options
+)
+from users.models import JobKind, JobStatus, TimetableJob
+from users.utils import (
+    generate_exam_timetable,
+    incremental_timetable_generation,
+    timetable_generation
+)
+from users.timetable_slots import save_timetable_slots
+
+
+# In-process runner for timetable jobs. The job row is the source of
+# truth for status and results, so the polling endpoint only reads it.
+executor = ThreadPoolExecutor(
+    max_workers=settings.TIMETABLE_JOB_WORKERS,
+    thread_name_prefix="timetable-job"
+)
+
+
+def run_exam_job(exam_timetable):
+    generated_csv_path = generate_exam_timetable(
+        exam_timetable.uploaded_csv.path,
+        exam_timetable.start_date.strftime("%Y-%m-%d"),
+        exam_timetable.end_date.strftime("%Y-%m-%d"),
+        chunksize=settings.EXAM_TIMETABLE_CHUNK_SIZE,
+        **stored_schedule_options(exam_timetable)
+    )
+    exam_timetable.generated_timetable_csv = generated_csv_path
+    exam_timetable.save(update_fields=["generated_timetable_csv"])
+    evict_exam_timetable_cache(keep=[generated_csv_path])
+    return {
+        "exam_timetable": str(exam_timetable.id),
+        "generated_csv_path": generated_csv_path
+    }
+
+
+# Result of the last finished job for a school timetable, if any
+def latest_class_result(school_timetable):
+    job = school_timetable.jobs.filter(
+        status=JobStatus.DONE
+    ).order_by("-updated_at").first()
+    return job.result if job else None
+
+
+def run_class_job(school_timetable):
+    previous = (
+        latest_class_result(school_timetable.based_on)
+        if school_timetable.based_on_id
+        else None
+    )
+    delta = None
+    with open(school_timetable.subjects_csv.path, newline="") as subject_csv:
+        if previous and "roster" in previous:
+            (
+                class_timetable,
+                teachers_timetable,
+                roster,
+                metrics,
+                delta
+            ) = incremental_timetable_generation(
+                subject_csv,
+                school_timetable.teachers_data_csv.path,
+                previous,
+                solver=settings.CLASS_TIMETABLE_SOLVER,
+                seed=settings.CLASS_TIMETABLE_SEED
+            )
+        else:
+            (
+                class_timetable,
+                teachers_timetable,
+                roster,
+                metrics
+            ) = timetable_generation(
+                subject_csv,
+                school_timetable.teachers_data_csv.path,
+                processes=settings.CLASS_TIMETABLE_PROCESSES,
+                solver=settings.CLASS_TIMETABLE_SOLVER,
+                seed=settings.CLASS_TIMETABLE_SEED
+            )
+    saved = save_timetable_slots(
+        school_timetable,
+        class_timetable,
+        teachers_timetable,
+        roster
+    )
+    result = {
+        "class_timetable": class_timetable.to_dict(),
+        "teachers_timetable": teachers_timetable.to_dict(),
+        "roster": roster,
+        "metrics": metrics,
+        "teacher_periods": class_timetable.teacher_periods_dict(),
+        "teacher_csv_path": saved["teacher_csv_path"]
+    }
+    if delta is not None:
+        result["delta"] = delta
+    return result
+
+
+def run_timetable_job(job_id):
+    job = TimetableJob.objects.select_related(
+        "exam_timetable",
+        "school_timetable"
+    ).get(id=job_id)
+    job.status = JobStatus.RUNNING
+    job.save(update_fields=["status", "updated_at"])
+    try:
+        if job.kind == JobKind.EXAM:
+            job.result = run_exam_job(job.exam_timetable)
+        else:
+            job.result = run_class_job(job.school_timetable)
+        job.status = JobStatus.DONE
+    except Exception as e:
+        traceback.print_exc()
+        job.status = JobStatus.FAILED
+        job.error_message = str(e)
+    finally:
+        job.save(update_fields=[
+            "status",
+            "result",
+            "error_message",
+            "updated_at"
+        ])
+        connection.close()  # Worker threads don't get request cleanup
+
+
+# Queue a job once the transaction that created it has committed, so the
+# worker thread can see the row
+def enqueue_timetable_job(job):
+    transaction.on_commit(lambda: executor.submit(run_timetable_job, job.id))
+    return job
+
+
+# Jobs the executor lost, e.g. to a process restart: still PENDING or
+# RUNNING and untouched for `older_than`
+def stale_timetable_jobs(older_than):
+    return TimetableJob.objects.filter(
+        status__in=[JobStatus.PENDING, JobStatus.RUNNING],
+        updated_at__lt=timezone.now() - older_than
+    ).order_by("created_date")
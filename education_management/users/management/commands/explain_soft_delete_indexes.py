@@ -0,0 +1,122 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from users.models import (
+    Attendance,
+    Class,
+    Student,
+    StudentAssessment,
+    User
+)
+
+
+# (index, builds the query it serves from one sample row, or None when
+# the table is empty)
+CASES = [
+    (
+        "attendance_class_date_idx",
+        lambda: _sample(
+            Attendance,
+            lambda row: Attendance.active.filter(
+                class_attended_id=row.class_attended_id,
+                date_of_attendance=row.date_of_attendance
+            )
+        )
+    ),
+    (
+        "student_class_active_idx",
+        lambda: _sample(
+            Student,
+            lambda row: Student.active.filter(
+                class_enrolled_id=row.class_enrolled_id
+            ).order_by("roll_number")
+        )
+    ),
+    (
+        "assessment_exam_marks_idx",
+        lambda: _sample(
+            StudentAssessment,
+            lambda row: StudentAssessment.active.filter(
+                exam_id=row.exam_id
+            ).order_by("-marks_obtained")
+        )
+    ),
+    (
+        "user_role_active_idx",
+        lambda: _sample(
+            User,
+            lambda row: User.active.filter(role=row.role)
+        )
+    ),
+    (
+        "class_active_idx",
+        lambda: _sample(
+            Class,
+            lambda row: Class.active.order_by("class_name", "division")
+        )
+    ),
+]
+
+
+def _sample(model, build_query):
+    row = model.objects.first()
+    return build_query(row) if row else None
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN the hot active-row queries with and without their partial "
+        "indexes. Each index is dropped inside a transaction that is rolled "
+        "back, which locks its table for the run, so use a copy of "
+        "production data rather than the live database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=20,
+            help="Timed runs of each query (default: 20)"
+        )
+
+    def handle(self, *args, **options):
+        # SQLite keeps serving the cached EXPLAIN of a dropped index, so
+        # only PostgreSQL gives a real comparison
+        if connection.vendor != "postgresql":
+            self.stdout.write(self.style.WARNING(
+                "Skipped: this benchmark needs PostgreSQL, and the "
+                f"database is {connection.vendor}"
+            ))
+            return
+        for index_name, build_query in CASES:
+            query = build_query()
+            if query is None:
+                self.stdout.write(f"{index_name}: no rows to sample, skipped")
+                continue
+            with_index = self.measure(query, options)
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f"DROP INDEX {connection.ops.quote_name(index_name)}"
+                    )
+                without_index = self.measure(query, options)
+                transaction.set_rollback(True)
+
+            self.stdout.write(self.style.MIGRATE_HEADING(index_name))
+            for label, (plan, seconds) in (
+                ("with index", with_index),
+                ("without index", without_index),
+            ):
+                self.stdout.write(
+                    f"  {label}: {seconds * 1000:.3f} ms per query"
+                )
+                for line in plan.splitlines():
+                    self.stdout.write(f"    {line}")
+
+    # ANALYZE runs the query and adds actual row counts and times
+    def measure(self, query, options):
+        plan = query.explain(analyze=True)
+        started = time.perf_counter()
+        for _ in range(options["repeat"]):
+            list(query.all())
+        return plan, (time.perf_counter() - started) / options["repeat"]
@@ -0,0 +1,191 @@
+import os
+import time
+from datetime import datetime
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from education_management import settings
+from users.exam_cache import (
+    evict_exam_timetable_cache,
+    exam_timetable_cache_key,
+    get_cached_exam_timetable,
+    stored_schedule_options
+)
+from users.models import ExamTimeTable, JobStatus
+from users.utils import process_pool, timed_exam_timetable_job
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate exam timetables for many subject CSVs in parallel and "
+        "record them on ExamTimeTable rows"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "csv_files",
+            nargs="*",
+            help="Subject CSVs, one per school"
+        )
+        parser.add_argument("--start-date", help="YYYY-MM-DD")
+        parser.add_argument("--end-date", help="YYYY-MM-DD")
+        parser.add_argument(
+            "--pending",
+            action="store_true",
+            help="Also generate uploaded ExamTimeTable rows with no timetable"
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count(),
+            help="Worker processes (default: CPU count)"
+        )
+        parser.add_argument(
+            "--blackout-date",
+            action="append",
+            default=[],
+            dest="blackout_dates",
+            help="School closure (YYYY-MM-DD) on top of public holidays; "
+                 "can be repeated"
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=settings.EXAM_TIMETABLE_SEED
+        )
+        parser.add_argument(
+            "--packed",
+            action="store_true",
+            help="Pack exams into the fewest days instead of spreading them"
+        )
+        parser.add_argument(
+            "--max-exams-per-day",
+            type=int,
+            help="Packed mode: exams the school can hold per day"
+        )
+        parser.add_argument(
+            "--min-gap-days",
+            type=int,
+            default=0,
+            help="Packed mode: free days between two exams of a class"
+        )
+
+    def handle(self, *args, **options):
+        schedule_options = {
+            "seed": options["seed"],
+            "blackout_dates": tuple(sorted(options["blackout_dates"])),
+            "packed": options["packed"],
+            "max_exams_per_day": options["max_exams_per_day"],
+            "min_gap_days": options["min_gap_days"],
+        }
+        exam_timetables = []
+
+        if options["csv_files"]:
+            if not options["start_date"] or not options["end_date"]:
+                raise CommandError(
+                    "--start-date and --end-date are required with CSV files"
+                )
+            exam_timetables.extend(self.register_csv_files(
+                options["csv_files"],
+                options["start_date"],
+                options["end_date"],
+                schedule_options
+            ))
+        if options["pending"]:
+            # Rows a background job is still working on are left to it
+            exam_timetables.extend(ExamTimeTable.objects.filter(
+                Q(generated_timetable_csv__isnull=True) |
+                Q(generated_timetable_csv="")
+            ).exclude(
+                jobs__status__in=[JobStatus.PENDING, JobStatus.RUNNING]
+            ).distinct())
+        if not exam_timetables:
+            self.stdout.write("Nothing to generate")
+            return
+
+        jobs = [
+            (
+                exam_timetable.uploaded_csv.path,
+                exam_timetable.start_date.strftime("%Y-%m-%d"),
+                exam_timetable.end_date.strftime("%Y-%m-%d"),
+                # Each row keeps the options its cache key was built from;
+                # the command line ones only apply to new CSV files
+                dict(
+                    stored_schedule_options(exam_timetable),
+                    chunksize=settings.EXAM_TIMETABLE_CHUNK_SIZE
+                )
+            )
+            for exam_timetable in exam_timetables
+        ]
+
+        started = time.perf_counter()
+        failed = []
+        generated = []
+        with process_pool(options["workers"]) as pool:
+            results = pool.map(timed_exam_timetable_job, jobs)
+            for exam_timetable, job, result in zip(
+                exam_timetables, jobs, results
+            ):
+                generated_csv_path, elapsed, error_message = result
+                if not generated_csv_path:
+                    failed.append(f"{job[0]}: {error_message}")
+                    self.stderr.write(
+                        f"FAILED  {job[0]} ({elapsed:.2f}s) {error_message}"
+                    )
+                    continue
+                exam_timetable.generated_timetable_csv = generated_csv_path
+                exam_timetable.save(update_fields=["generated_timetable_csv"])
+                generated.append(generated_csv_path)
+                self.stdout.write(
+                    f"{elapsed:8.2f}s  {job[0]} -> {generated_csv_path}"
+                )
+
+        evict_exam_timetable_cache(keep=generated)
+        summary = (
+            f"Generated {len(jobs) - len(failed)} of {len(jobs)} timetables "
+            f"in {time.perf_counter() - started:.2f}s "
+            f"with {options['workers']} workers"
+        )
+        if failed:
+            raise CommandError("\n".join([summary] + failed))
+        self.stdout.write(self.style.SUCCESS(summary))
+
+    # Store each CSV as an ExamTimeTable upload, skipping the ones the
+    # cache already has a timetable for
+    def register_csv_files(
+            self,
+            csv_files,
+            start_date,
+            end_date,
+            schedule_options
+        ):
+        start = datetime.strptime(start_date, "%Y-%m-%d")
+        end = datetime.strptime(end_date, "%Y-%m-%d")
+        exam_timetables = []
+        for csv_path in csv_files:
+            with open(csv_path, "rb") as f:
+                csv_file = File(f, name=os.path.basename(csv_path))
+                cache_key = exam_timetable_cache_key(
+                    csv_file,
+                    start_date,
+                    end_date,
+                    **schedule_options
+                )
+                cached = get_cached_exam_timetable(cache_key)
+                if cached:
+                    self.stdout.write(
+                        f"  cached  {csv_path} -> "
+                        f"{cached.generated_timetable_csv.name}"
+                    )
+                    continue
+                exam_timetables.append(ExamTimeTable.objects.create(
+                    start_date=start,
+                    end_date=end,
+                    uploaded_csv=csv_file,
+                    cache_key=cache_key,
+                    schedule_options=dict(
+                        schedule_options,
+                        blackout_dates=list(schedule_options["blackout_dates"])
+                    )
+                ))
+        return exam_timetables
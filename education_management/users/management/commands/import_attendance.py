@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+from users.attendance import read_attendance_csv, upsert_attendance
+
+
+class Command(BaseCommand):
+    help = (
+        "Upsert attendance from CSVs with class_id, roll_number, "
+        "date_of_attendance and is_present columns"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_files", nargs="+")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Rows per INSERT (default: ATTENDANCE_BATCH_SIZE)"
+        )
+
+    def handle(self, *args, **options):
+        for csv_path in options["csv_files"]:
+            errors = []
+            try:
+                with open(csv_path, newline="", encoding="utf-8-sig") as f:
+                    report = upsert_attendance(
+                        read_attendance_csv(f, errors),
+                        batch_size=options["batch_size"]
+                    )
+            except OSError as e:
+                raise CommandError(str(e))
+            for line, message in errors:
+                self.stderr.write(f"  {csv_path}:{line}: {message}")
+            self.stdout.write(self.style.SUCCESS(
+                f"{csv_path}: {report['rows']} rows in "
+                f"{report['seconds']:.2f}s "
+                f"({report['rows_per_second']} rows/s), "
+                f"{len(errors)} skipped"
+            ))
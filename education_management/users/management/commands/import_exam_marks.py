@@ -0,0 +1,80 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from education_management import settings
+from users.marks_import import (
+    check_grade_boundaries,
+    import_exam_marks,
+    read_marks_sheet
+)
+from users.models import Exam
+
+
+class Command(BaseCommand):
+    help = (
+        "Import exam marks from a CSV or Excel sheet with roll_number and "
+        "marks_obtained columns (plus exam_id without --exam) and grade them"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("sheet")
+        parser.add_argument("--exam", help="Exam id for every row")
+        parser.add_argument(
+            "--max-marks",
+            type=float,
+            default=settings.EXAM_MAX_MARKS
+        )
+        parser.add_argument(
+            "--boundary",
+            action="append",
+            default=[],
+            dest="boundaries",
+            help="GRADE=MIN_PERCENT, e.g. A=85; replaces GRADE_BOUNDARIES "
+                 "when given; can be repeated"
+        )
+        parser.add_argument(
+            "--no-rank",
+            action="store_false",
+            dest="rank",
+            help="Don't re-rank the exams' classes afterwards"
+        )
+
+    def handle(self, *args, **options):
+        exam = None
+        if options["exam"]:
+            try:
+                exam = Exam.active.get(id=options["exam"])
+            except (Exam.DoesNotExist, ValidationError) as e:
+                raise CommandError(f"Exam {options['exam']}: {e}")
+        try:
+            boundaries = {
+                grade.strip().upper(): float(minimum)
+                for grade, minimum in (
+                    boundary.split("=") for boundary in options["boundaries"]
+                )
+            }
+            check_grade_boundaries(boundaries)
+            sheet = read_marks_sheet(options["sheet"])
+            columns = [str(column).strip().lower() for column in sheet]
+            if exam and "exam_id" in columns:
+                raise CommandError(
+                    f"{options['sheet']} has an exam_id column; leave out "
+                    f"--exam or drop the column"
+                )
+            report = import_exam_marks(
+                sheet,
+                exam=exam,
+                max_marks=options["max_marks"],
+                boundaries=boundaries or None,
+                rank=options["rank"]
+            )
+        except (OSError, ValueError, ImportError) as e:
+            raise CommandError(str(e))
+        for line, message in report["errors"]:
+            self.stderr.write(f"  {options['sheet']}:{line}: {message}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['rows']} assessments ({report['created']} new, "
+            f"{report['updated']} updated) for {len(report['exams'])} exams "
+            f"in {report['seconds']:.2f}s "
+            f"({report['rows_per_second']} rows/s), "
+            f"{report['skipped']} skipped, {report['ranked']} students ranked"
+        ))
@@ -0,0 +1,49 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from users.models import Class, Exam
+from users.rankings import rank_students
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute class and grade ranks from exam marks and store each "
+        "class's top three in Student.rank"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--exam",
+            action="append",
+            default=[],
+            dest="exams",
+            help="Only re-rank the grades of this exam's class; can be repeated"
+        )
+        parser.add_argument(
+            "--class",
+            action="append",
+            default=[],
+            dest="classes",
+            help="Only re-rank this class's grade; can be repeated"
+        )
+
+    def handle(self, *args, **options):
+        class_ids = None
+        if options["exams"] or options["classes"]:
+            class_ids = {
+                self.lookup(Exam, exam_id).class_level_id
+                for exam_id in options["exams"]
+            } | {
+                self.lookup(Class, class_id).id
+                for class_id in options["classes"]
+            }
+        report = rank_students(class_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f"Ranked {report['ranked']} students in "
+            f"{report['seconds']:.2f}s, {report['updated']} ranks changed"
+        ))
+
+    def lookup(self, model, object_id):
+        try:
+            return model.objects.get(id=object_id)
+        except (model.DoesNotExist, ValidationError) as e:
+            raise CommandError(f"{model.__name__} {object_id}: {e}")
@@ -0,0 +1,18 @@
+import time
+from django.core.management.base import BaseCommand
+from users.attendance_rollups import rebuild_attendance_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount the attendance rollup tables from student_attendances, "
+        "e.g. after rows were changed with QuerySet.update()"
+    )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        rebuild_attendance_rollups()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt attendance rollups in "
+            f"{time.perf_counter() - started:.2f}s"
+        ))
@@ -0,0 +1,60 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from users.jobs import run_timetable_job, stale_timetable_jobs
+from users.models import JobStatus
+
+
+class Command(BaseCommand):
+    help = (
+        "Run timetable jobs again that were left PENDING or RUNNING, e.g. "
+        "after the web process restarted, or mark them failed with --fail. "
+        "The in-process executor never picks these up on its own."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than",
+            type=int,
+            default=30,
+            help=(
+                "Only jobs not updated for this many minutes, so jobs a "
+                "live process is still running are left alone (default: 30)"
+            )
+        )
+        parser.add_argument(
+            "--fail",
+            action="store_true",
+            help="Mark the jobs FAILED instead of running them again"
+        )
+
+    def handle(self, *args, **options):
+        jobs = list(stale_timetable_jobs(
+            timedelta(minutes=options["older_than"])
+        ))
+        if options["fail"]:
+            for job in jobs:
+                job.status = JobStatus.FAILED
+                job.error_message = "Interrupted before it finished"
+                job.save(update_fields=[
+                    "status",
+                    "error_message",
+                    "updated_at"
+                ])
+            self.stdout.write(self.style.SUCCESS(
+                f"Marked {len(jobs)} interrupted jobs as failed"
+            ))
+            return
+
+        done = 0
+        for job in jobs:
+            # Runs in this process, one job at a time
+            run_timetable_job(job.id)
+            job.refresh_from_db(fields=["status", "error_message"])
+            done += job.status == JobStatus.DONE
+            self.stdout.write(
+                f"  {job.id} {job.kind}: {job.status}"
+                + (f" ({job.error_message})" if job.error_message else "")
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Requeued {len(jobs)} jobs, {done} finished"
+        ))
@@ -0,0 +1,208 @@
+import time
+import uuid
+import numpy as np
+import pandas as pd
+from django.db import transaction
+from education_management import settings
+from users.models import Exam, Grade, Student, StudentAssessment
+from users.rankings import classes_for_exams, rank_students
+
+
+MARKS_COLUMNS = ["roll_number", "marks_obtained"]
+
+
+# Marks sheet as a DataFrame; .xlsx/.xls need openpyxl/xlrd installed
+def read_marks_sheet(sheet_file, name=None):
+    name = name or getattr(sheet_file, "name", None) or str(sheet_file)
+    if name.lower().endswith((".xlsx", ".xls")):
+        return pd.read_excel(sheet_file, dtype=str)
+    return pd.read_csv(sheet_file, dtype=str, keep_default_na=False)
+
+
+# Boundary labels must be Grade values, or the write fails at the
+# database (and differently on SQLite and PostgreSQL)
+def check_grade_boundaries(boundaries):
+    unknown = sorted(set(boundaries) - set(Grade.values))
+    if unknown:
+        raise ValueError(
+            f"Unknown grades in boundaries: {', '.join(unknown)} "
+            f"(expected {', '.join(Grade.values)})"
+        )
+
+
+# Grade for every mark in one vectorised pass. `boundaries` maps a grade
+# to the lowest percentage that earns it; lower marks get an F.
+def grade_marks(marks, max_marks=None, boundaries=None):
+    max_marks = max_marks or settings.EXAM_MAX_MARKS
+    boundaries = boundaries or settings.GRADE_BOUNDARIES
+    check_grade_boundaries(boundaries)
+    percentages = np.asarray(marks, dtype=float) * 100 / max_marks
+    ordered = sorted(boundaries.items(), key=lambda item: item[1], reverse=True)
+    return np.select(
+        [percentages >= minimum for _, minimum in ordered],
+        [grade for grade, _ in ordered],
+        default=Grade.F
+    )
+
+
+def _is_uuid(value):
+    try:
+        uuid.UUID(value)
+    except ValueError:
+        return False
+    return True
+
+
+# Import a marks sheet (roll_number, marks_obtained and, for sheets that
+# cover several exams, exam_id) into StudentAssessment. `exam` is for
+# sheets without exam_id only. Roll numbers are looked up in each exam's
+# class. All rows are upserted on the (exam, student) key with
+# bulk_create in one transaction, so an existing or soft-deleted
+# assessment is overwritten. Unreadable rows are skipped
+# and reported as (line, message); a repeated (exam, student) keeps its
+# last row. With `rank`, the classes of the imported exams are re-ranked
+# in the same transaction.
+def import_exam_marks(
+        sheet,
+        exam=None,
+        max_marks=None,
+        boundaries=None,
+        rank=True
+    ):
+    started = time.perf_counter()
+    max_marks = max_marks or settings.EXAM_MAX_MARKS
+    check_grade_boundaries(boundaries or settings.GRADE_BOUNDARIES)
+    frame = sheet.rename(columns=lambda column: str(column).strip().lower())
+    if "exam_id" in frame and exam is not None:
+        raise ValueError(
+            "The sheet has an exam_id column, so no exam can be given for "
+            "every row"
+        )
+    missing = [column for column in MARKS_COLUMNS if column not in frame]
+    if "exam_id" not in frame and exam is None:
+        missing.append("exam_id")
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+    frame = pd.DataFrame({
+        "line": frame.index + 2,
+        "exam_id": (
+            frame["exam_id"].astype(str).str.strip()
+            if "exam_id" in frame
+            else str(exam.id)
+        ),
+        "roll_number": pd.to_numeric(frame["roll_number"], errors="coerce"),
+        "marks_obtained": pd.to_numeric(
+            frame["marks_obtained"],
+            errors="coerce"
+        )
+    })
+
+    exam_classes = {
+        str(exam_id): str(class_id)
+        for exam_id, class_id in Exam.active.filter(
+            id__in=[
+                exam_id
+                for exam_id in frame["exam_id"].unique()
+                if _is_uuid(exam_id)
+            ]
+        ).values_list("id", "class_level_id")
+    }
+    frame["class_id"] = frame["exam_id"].map(exam_classes)
+    students = pd.DataFrame(
+        [
+            (str(class_id), roll_number, str(student_id))
+            for class_id, roll_number, student_id in Student.active.filter(
+                class_enrolled_id__in=set(exam_classes.values())
+            ).values_list("class_enrolled_id", "roll_number", "id")
+        ],
+        columns=["class_id", "roll_number", "student_id"],
+        dtype=object
+    )
+    students["roll_number"] = students["roll_number"].astype(float)
+    frame = frame.merge(students, on=["class_id", "roll_number"], how="left")
+
+    problems = [
+        (frame["class_id"].isna(), "Unknown exam"),
+        (frame["roll_number"].isna(), "Roll number is not a number"),
+        (frame["marks_obtained"].isna(), "Marks are not a number"),
+        (
+            (frame["marks_obtained"] < 0) |
+            (frame["marks_obtained"] > max_marks),
+            f"Marks must be between 0 and {max_marks:g}"
+        ),
+        (frame["student_id"].isna(), "No student with this roll number"),
+    ]
+    reason = np.select(
+        [mask.to_numpy() for mask, _ in problems],
+        [message for _, message in problems],
+        default=""
+    )
+    errors = list(zip(frame["line"][reason != ""], reason[reason != ""]))
+    frame = frame[reason == ""].drop_duplicates(
+        ["exam_id", "student_id"],
+        keep="last"
+    )
+    frame["grade"] = grade_marks(
+        frame["marks_obtained"],
+        max_marks,
+        boundaries
+    )
+
+    exam_ids = sorted(frame["exam_id"].unique().tolist())
+    existing = set(
+        StudentAssessment.objects.filter(
+            exam_id__in=exam_ids,
+            student_id__in=frame["student_id"].unique().tolist()
+        ).values_list("exam_id", "student_id")
+    )
+    assessments = [
+        StudentAssessment(
+            exam_id=exam_id,
+            student_id=student_id,
+            marks_obtained=float(marks),
+            grade=str(grade)
+        )
+        for exam_id, student_id, marks, grade in zip(
+            frame["exam_id"],
+            frame["student_id"],
+            frame["marks_obtained"],
+            frame["grade"]
+        )
+    ]
+    with transaction.atomic():
+        StudentAssessment.objects.bulk_create(
+            assessments,
+            batch_size=settings.MARKS_IMPORT_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=["exam", "student"],
+            update_fields=[
+                "marks_obtained",
+                "grade",
+                "is_deleted",
+                "updated_at"
+            ]
+        )
+        ranking = (
+            rank_students(classes_for_exams(exam_ids))
+            if rank and assessments
+            else None
+        )
+    updated = sum(
+        (uuid.UUID(exam_id), uuid.UUID(student_id)) in existing
+        for exam_id, student_id in zip(frame["exam_id"], frame["student_id"])
+    )
+
+    seconds = time.perf_counter() - started
+    rows = len(assessments)
+    return {
+        "exams": exam_ids,
+        "rows": rows,
+        "created": rows - updated,
+        "updated": updated,
+        "skipped": len(errors),
+        "errors": [(int(line), str(message)) for line, message in errors],
+        "seconds": round(seconds, 4),
+        "rows_per_second": round(rows / seconds) if seconds else rows,
+        "ranked": ranking["ranked"] if ranking else 0
+    }
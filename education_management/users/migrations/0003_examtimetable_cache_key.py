@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_examtimetable_schooltimetable'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='examtimetable',
+            name='cache_key',
+            field=models.CharField(blank=True, db_index=True, max_length=64, null=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_timetablejob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schooltimetable',
+            name='based_on',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='revisions', to='users.schooltimetable'),
+        ),
+    ]
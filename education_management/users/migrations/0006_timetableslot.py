@@ -0,0 +1,32 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:31
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_schooltimetable_based_on'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimetableSlot',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('class_name', models.CharField(max_length=10)),
+                ('day', models.CharField(max_length=10)),
+                ('period', models.PositiveSmallIntegerField()),
+                ('subject', models.CharField(max_length=100)),
+                ('teacher', models.CharField(blank=True, default='', max_length=255)),
+                ('school_timetable', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slots', to='users.schooltimetable')),
+            ],
+            options={
+                'db_table': 'timetable_slots',
+                'indexes': [models.Index(fields=['school_timetable', 'teacher', 'day', 'period'], name='timetable_slot_teacher_idx')],
+                'unique_together': {('school_timetable', 'class_name', 'day', 'period')},
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:34
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_timetableslot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClassDailyAttendance',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('date_of_attendance', models.DateField()),
+                ('present', models.PositiveIntegerField(default=0)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('class_attended', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_attendances', to='users.class')),
+            ],
+            options={
+                'db_table': 'class_daily_attendances',
+                'unique_together': {('class_attended', 'date_of_attendance')},
+            },
+        ),
+        migrations.CreateModel(
+            name='StudentMonthlyAttendance',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('month', models.DateField()),
+                ('present', models.PositiveIntegerField(default=0)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_attendances', to='users.student')),
+            ],
+            options={
+                'db_table': 'student_monthly_attendances',
+                'unique_together': {('student', 'month')},
+            },
+        ),
+    ]
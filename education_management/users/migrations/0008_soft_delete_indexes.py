@@ -0,0 +1,57 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_classdailyattendance_studentmonthlyattendance'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='administrator',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['name'], name='administrator_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['class_attended', 'date_of_attendance'], name='attendance_class_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='class',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['class_name', 'division'], name='class_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exam',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['class_level', 'subject'], name='exam_class_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='parent',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['name'], name='parent_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='questionpaper',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['subject', 'class_level'], name='question_paper_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['class_enrolled', 'roll_number'], name='student_class_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentassessment',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['exam', '-marks_obtained'], name='assessment_exam_marks_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentreport',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['student'], name='student_report_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subject',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['subject_name'], name='subject_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teacher',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['name'], name='teacher_active_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_soft_delete_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='examtimetable',
+            name='schedule_options',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
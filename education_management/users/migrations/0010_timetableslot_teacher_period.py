@@ -0,0 +1,26 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0009_examtimetable_schedule_options'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='timetableslot',
+            name='timetable_slot_teacher_idx',
+        ),
+        migrations.AddField(
+            model_name='timetableslot',
+            name='teacher_period',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='timetableslot',
+            index=models.Index(fields=['school_timetable', 'teacher', 'day', 'teacher_period'], name='timetable_slot_teacher_idx'),
+        ),
+    ]
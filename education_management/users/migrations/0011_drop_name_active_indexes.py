@@ -0,0 +1,29 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:59
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0010_timetableslot_teacher_period'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='administrator',
+            name='administrator_active_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='parent',
+            name='parent_active_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='subject',
+            name='subject_active_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='teacher',
+            name='teacher_active_idx',
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0011_drop_name_active_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='administrator',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['name'], name='administrator_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='parent',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['name'], name='parent_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subject',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['subject_name'], name='subject_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teacher',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['name'], name='teacher_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['role'], name='user_role_active_idx'),
+        ),
+    ]
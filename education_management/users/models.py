@@ -23,6 +23,19 @@ class CustomUserManager(BaseUserManager):
         return self.create_user(email, password, **extra_fields)
 
 
+# `active` on soft-deleted models: only rows that are not deleted.
+# `objects` stays first, as the default manager, so uniqueness checks,
+# the admin, dumpdata and related lookups still see every row and a
+# deleted row can be restored.
+class SoftDeleteManager(models.Manager):
+    def get_queryset(self):
+        return super().get_queryset().filter(is_deleted=False)
+
+
+# Condition of the partial indexes that back SoftDeleteManager queries
+ACTIVE = models.Q(is_deleted=False)
+
+
 class User(AbstractBaseUser, PermissionsMixin):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     email = models.EmailField(unique=True)
@@ -36,13 +49,23 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
 
+    # CustomUserManager stays the default: authentication and the admin
+    # look users up through it
     objects = CustomUserManager()
+    active = SoftDeleteManager()
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = []
 
     class Meta:
         db_table = 'users'
+        indexes = [
+            models.Index(
+                fields=['role'],
+                condition=ACTIVE,
+                name='user_role_active_idx'
+            )
+        ]
 
     def __str__(self):
         return self.email
@@ -61,8 +84,18 @@ class Administrator(models.Model):
     created_date = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = models.Manager()
+    active = SoftDeleteManager()
+
     class Meta:
         db_table = 'administrators'
+        indexes = [
+            models.Index(
+                fields=['name'],
+                condition=ACTIVE,
+                name='administrator_active_idx'
+            )
+        ]
 
     def __str__(self):
         return self.name
@@ -89,9 +122,19 @@ class Class(models.Model):
     created_date = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = models.Manager()
+    active = SoftDeleteManager()
+
     class Meta:
         db_table = 'classes'
         verbose_name_plural = 'classes'
+        indexes = [
+            models.Index(
+                fields=['class_name', 'division'],
+                condition=ACTIVE,
+                name='class_active_idx'
+            )
+        ]
 
     def __str__(self):
         return f"{self.class_name} - Division {self.division}"
@@ -104,8 +147,18 @@ class Subject(models.Model):
     created_date = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = models.Manager()
+    active = SoftDeleteManager()
+
     class Meta:
         db_table = 'subjects'
+        indexes = [
+            models.Index(
+                fields=['subject_name'],
+                condition=ACTIVE,
+                name='subject_active_idx'
+            )
+        ]
 
     def __str__(self):
         return self.subject_name
@@ -126,8 +179,18 @@ class Teacher(models.Model):
     created_date = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = models.Manager()
+    active = SoftDeleteManager()
+
     class Meta:
         db_table = 'teachers'
+        indexes = [
+            models.Index(
+                fields=['name'],
+                condition=ACTIVE,
+                name='teacher_active_idx'
+            )
+        ]
 
     def __str__(self):
         return self.name
@@ -170,10 +233,20 @@ class Student(models.Model):
     created_date = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = models.Manager()
+    active = SoftDeleteManager()
+
     class Meta:
         db_table = 'students'
         unique_together = ['roll_number', 'class_enrolled']
         # Ensures unique roll numbers within a class
+        indexes = [
+            models.Index(
+                fields=['class_enrolled', 'roll_number'],
+                condition=ACTIVE,
+                name='student_class_active_idx'
+            )
+        ]
 
     def __str__(self):
         return f"{
@@ -199,8 +272,18 @@ class Parent(models.Model):
     created_date = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = models.Manager()
+    active = SoftDeleteManager()
+
     class Meta:
         db_table = 'parents'
+        indexes = [
+            models.Index(
+                fields=['name'],
+                condition=ACTIVE,
+                name='parent_active_idx'
+            )
+        ]
 
     def __str__(self):
         return self.name
@@ -234,8 +317,18 @@ class QuestionPaper(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     is_deleted = models.BooleanField(default=False)
 
+    objects = models.Manager()
+    active = SoftDeleteManager()
+
     class Meta:
         db_table = 'question_papers'
+        indexes = [
+            models.Index(
+                fields=['subject', 'class_level'],
+                condition=ACTIVE,
+                name='question_paper_active_idx'
+            )
+        ]
 
     def __str__(self):
         return f"{self.subject} - {self.class_level} ({self.question_type})"
@@ -264,8 +357,18 @@ class Exam(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     is_deleted = models.BooleanField(default=False)
 
+    objects = models.Manager()
+    active = SoftDeleteManager()
+
     class Meta:
         db_table = 'exams'
+        indexes = [
+            models.Index(
+                fields=['class_level', 'subject'],
+                condition=ACTIVE,
+                name='exam_class_active_idx'
+            )
+        ]
 
     def __str__(self):
         return f"{self.exam_name} - {self.subject} ({self.class_level})"
@@ -302,10 +405,20 @@ class StudentAssessment(models.Model):
     created_date = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = models.Manager()
+    active = SoftDeleteManager()
+
     class Meta:
         db_table = 'student_assessments'
         unique_together = ['exam', 'student']
         # Prevents duplicate entries for same student and exam
+        indexes = [
+            models.Index(
+                fields=['exam', '-marks_obtained'],
+                condition=ACTIVE,
+                name='assessment_exam_marks_idx'
+            )
+        ]
 
     def __str__(self):
         return f"{self.student} - {self.exam} (Grade: {self.grade})"
@@ -329,10 +442,20 @@ class Attendance(models.Model):
     created_date = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = models.Manager()
+    active = SoftDeleteManager()
+
     class Meta:
         db_table = 'student_attendances'
         unique_together = ['student', 'date_of_attendance', 'class_attended']
         # Prevents duplicate attendance entries
+        indexes = [
+            models.Index(
+                fields=['class_attended', 'date_of_attendance'],
+                condition=ACTIVE,
+                name='attendance_class_date_idx'
+            )
+        ]
 
     def __str__(self):
         status = "Present" if self.is_present else "Absent"
@@ -345,6 +468,54 @@ class Attendance(models.Model):
         } ({status})"
 
 
+# Attendance rollups, kept up to date by users/attendance_rollups.py
+# whenever Attendance rows are written so dashboards never aggregate
+# raw attendance. Counts cover rows that are not soft-deleted.
+class ClassDailyAttendance(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    class_attended = models.ForeignKey(
+        Class,
+        on_delete=models.CASCADE,
+        related_name='daily_attendances'
+    )
+    date_of_attendance = models.DateField()
+    present = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'class_daily_attendances'
+        unique_together = ['class_attended', 'date_of_attendance']
+
+    def __str__(self):
+        return f"{
+            self.class_attended
+        } - {
+            self.date_of_attendance
+        } ({self.present}/{self.total})"
+
+
+class StudentMonthlyAttendance(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    student = models.ForeignKey(
+        Student,
+        on_delete=models.CASCADE,
+        related_name='monthly_attendances'
+    )
+    month = models.DateField()  # First day of the month
+    present = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'student_monthly_attendances'
+        unique_together = ['student', 'month']
+
+    def __str__(self):
+        month = self.month.strftime("%Y-%m")
+        return f"{self.student} - {month} ({self.present}/{self.total})"
+
+
 class StudentReport(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     student = models.ForeignKey(
@@ -357,8 +528,18 @@ class StudentReport(models.Model):
     created_date = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = models.Manager()
+    active = SoftDeleteManager()
+
     class Meta:
         db_table = 'student_reports'
+        indexes = [
+            models.Index(
+                fields=['student'],
+                condition=ACTIVE,
+                name='student_report_active_idx'
+            )
+        ]
 
     def __str__(self):
         return f"Report for {self.student}"
@@ -374,6 +555,16 @@ class ExamTimeTable(models.Model):
         null=True,
         blank=True
     )
+    cache_key = models.CharField(
+        max_length=64,
+        null=True,
+        blank=True,
+        db_index=True
+    )
+    # sha256 of the uploaded CSV, dates and seed
+    schedule_options = models.JSONField(default=dict, blank=True)
+    # Seed, blackout dates and packing options the cache key was built
+    # from, so the timetable can be generated again exactly as requested
 
     class Meta:
         db_table = 'exam_timetable'
@@ -391,9 +582,97 @@ class SchoolTimeTable(models.Model):
         null=True,
         blank=True
     )
+    # Earlier timetable this one was incrementally re-generated from
+    based_on = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='revisions'
+    )
 
     class Meta:
         db_table = "school_timetable"
 
     def __str__(self):
         return f"School Timetable: {self.id}"
+
+
+class JobKind(models.TextChoices):
+    EXAM = 'EXAM', 'Exam Timetable'
+    CLASS = 'CLASS', 'Class Timetable'
+
+
+class JobStatus(models.TextChoices):
+    PENDING = 'PENDING', 'Pending'
+    RUNNING = 'RUNNING', 'Running'
+    DONE = 'DONE', 'Done'
+    FAILED = 'FAILED', 'Failed'
+
+
+class TimetableJob(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=5, choices=JobKind.choices)
+    exam_timetable = models.ForeignKey(
+        ExamTimeTable,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='jobs'
+    )
+    school_timetable = models.ForeignKey(
+        SchoolTimeTable,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='jobs'
+    )
+    status = models.CharField(
+        max_length=7,
+        choices=JobStatus.choices,
+        default=JobStatus.PENDING
+    )
+    result = models.JSONField(null=True, blank=True)
+    error_message = models.TextField(blank=True, default="")
+    created_date = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'timetable_jobs'
+
+    def __str__(self):
+        return f"{self.kind} job {self.id} ({self.status})"
+
+
+# One period of one class in a generated school timetable. The teacher
+# is the roster teacher of the (class, subject), so "what is teacher X
+# doing on Tuesday period 3" is an indexed lookup.
+class TimetableSlot(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    school_timetable = models.ForeignKey(
+        SchoolTimeTable,
+        on_delete=models.CASCADE,
+        related_name='slots'
+    )
+    class_name = models.CharField(max_length=10)
+    day = models.CharField(max_length=10)
+    period = models.PositiveSmallIntegerField()  # 1-based
+    subject = models.CharField(max_length=100)
+    teacher = models.CharField(max_length=255, blank=True, default="")
+    # Period the teacher is booked for this lesson in the teacher grid,
+    # which may differ from `period`; None if they got no period
+    teacher_period = models.PositiveSmallIntegerField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'timetable_slots'
+        # Also serves class lookups; teacher lookups use the index below
+        unique_together = ['school_timetable', 'class_name', 'day', 'period']
+        indexes = [
+            models.Index(
+                fields=['school_timetable', 'teacher', 'day', 'teacher_period'],
+                name='timetable_slot_teacher_idx'
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.class_name} {self.day} P{self.period}: {self.subject}"
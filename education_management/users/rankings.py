@@ -0,0 +1,86 @@
+import time
+from django.db import transaction
+from django.db.models import F, Q, Sum, Window, functions
+from django.utils import timezone
+from users.models import Class, Exam, Rank, Student
+
+
+CLASS_RANKS = {1: Rank.FIRST, 2: Rank.SECOND, 3: Rank.THIRD}
+
+
+# Classes whose ranks an import into these exams can change
+def classes_for_exams(exam_ids):
+    return set(
+        Exam.objects.filter(id__in=exam_ids).values_list(
+            "class_level_id",
+            flat=True
+        )
+    )
+
+
+# Rank students by their total marks across their current class's exams,
+# within the class and within the grade (every division of a class
+# name), in one query with RANK() window functions. Student.rank keeps
+# the class podium (FIRST/SECOND/THIRD, ties share a place) and is
+# cleared for everyone else; only changed rows are written, with
+# bulk_update. `class_ids` limits the work to those classes' grades, e.g.
+# the classes of a newly imported exam; grade ranks need the whole
+# grade, so its other divisions are ranked too. Students without marks
+# are not ranked.
+def rank_students(class_ids=None):
+    started = time.perf_counter()
+    students = Student.active.all()
+    if class_ids is not None:
+        students = students.filter(
+            class_enrolled__class_name__in=Class.objects.filter(
+                id__in=class_ids
+            ).values("class_name")
+        )
+    total = Sum(
+        "assessments__marks_obtained",
+        filter=Q(
+            assessments__is_deleted=False,
+            assessments__exam__is_deleted=False,
+            assessments__exam__class_level=F("class_enrolled")
+        )
+    )
+    students = students.annotate(total=total).annotate(
+        class_rank=Window(
+            functions.Rank(),
+            partition_by=F("class_enrolled"),
+            order_by=F("total").desc(nulls_last=True)
+        ),
+        grade_rank=Window(
+            functions.Rank(),
+            partition_by=F("class_enrolled__class_name"),
+            order_by=F("total").desc(nulls_last=True)
+        )
+    )
+
+    results = []
+    changed = []
+    now = timezone.now()
+    for student in students:
+        ranked = student.total is not None
+        rank = CLASS_RANKS.get(student.class_rank) if ranked else None
+        if student.rank != rank:
+            student.rank = rank
+            student.updated_at = now  # bulk_update skips auto_now
+            changed.append(student)
+        if ranked:
+            results.append({
+                "student_id": str(student.id),
+                "class_id": str(student.class_enrolled_id),
+                "total": student.total,
+                "class_rank": student.class_rank,
+                "grade_rank": student.grade_rank
+            })
+
+    with transaction.atomic():
+        Student.objects.bulk_update(changed, ["rank", "updated_at"])
+    return {
+        "ranked": len(results),
+        "updated": len(changed),
+        "seconds": round(time.perf_counter() - started, 4),
+        "results": results
+    }
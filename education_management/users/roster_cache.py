@@ -0,0 +1,104 @@
+import copy
+import hashlib
+import json
+import os
+import time
+import uuid
+from functools import lru_cache
+from education_management import settings
+
+
+# Bumped when the compiled roster format changes, so rosters compiled by
+# older code are not reused
+ROSTER_FORMAT = 2
+
+
+# Content address of a teachers CSV compiled under a school configuration
+# and class teacher seed. Uploads are stored under new names, so the path
+# is left out: an identical CSV uploaded again hits the same roster.
+def teacher_roster_cache_key(csv_filepath, config, seed=None):
+    digest = hashlib.sha256()
+    with open(csv_filepath, "rb") as file:
+        for chunk in iter(lambda: file.read(64 * 1024), b""):
+            digest.update(chunk)
+    digest.update(
+        f"|{config.grades}|{config.sections}|{seed}|{ROSTER_FORMAT}".encode()
+    )
+    return digest.hexdigest()
+
+
+def _roster_path(cache_key):
+    return os.path.join(
+        settings.MEDIA_ROOT,
+        "teacher_rosters",
+        f"{cache_key}.json"
+    )
+
+
+@lru_cache(maxsize=32)
+def _read_teacher_roster(path, mtime):
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+# Compiled (expanded) teacher list for a cache key, if one was saved.
+# Kept in memory until the file changes; each caller gets its own copy,
+# so changing it never affects a later hit.
+def load_teacher_roster(cache_key):
+    path = _roster_path(cache_key)
+    try:
+        teachers = _read_teacher_roster(path, os.path.getmtime(path))
+        # Bump the access time only, as get_cached_exam_timetable does
+        os.utime(path, (time.time(), os.path.getmtime(path)))
+    except (OSError, ValueError):
+        return None
+    return copy.deepcopy(teachers)
+
+
+# Written to a temporary file first so a concurrent reader never sees a
+# partial roster. Old rosters are evicted afterwards, never this one.
+def save_teacher_roster(cache_key, teachers):
+    path = _roster_path(cache_key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        json.dump(teachers, file)
+    os.replace(temp_path, path)
+    evict_teacher_roster_cache(keep=[path])
+
+
+# Delete rosters that are too old, then the least recently used ones
+# until the folder fits in max_bytes, like evict_exam_timetable_cache.
+# Rosters in `keep` are never evicted, and a file a concurrent eviction
+# removed first is skipped.
+def evict_teacher_roster_cache(
+        max_age=settings.TEACHER_ROSTER_CACHE_MAX_AGE,
+        max_bytes=settings.TEACHER_ROSTER_CACHE_MAX_BYTES,
+        keep=()
+    ):
+    cache_dir = os.path.join(settings.MEDIA_ROOT, "teacher_rosters")
+    if not os.path.isdir(cache_dir):
+        return []
+
+    entries = sorted(
+        (entry.stat().st_atime, entry.stat().st_size, entry.name)
+        for entry in os.scandir(cache_dir)
+        if entry.is_file() and entry.name.endswith(".json")
+    )
+    total_bytes = sum(size for _, size, _ in entries)
+    oldest_allowed = time.time() - max_age
+
+    keep = {os.path.basename(str(path)) for path in keep}
+    evicted = []
+    for atime, size, name in entries:
+        if atime >= oldest_allowed and total_bytes <= max_bytes:
+            break
+        if name in keep:
+            continue
+        try:
+            os.remove(os.path.join(cache_dir, name))
+        except FileNotFoundError:
+            pass
+        total_bytes -= size
+        evicted.append(name)
+    return evicted
@@ -0,0 +1,65 @@
+from functools import lru_cache
+from education_management import settings
+
+
+WEEK_DAYS = [
+    'monday',
+    'tuesday',
+    'wednesday',
+    'thursday',
+    'friday',
+    'saturday',
+    'sunday'
+]
+
+
+# Shape of a school's class timetable: the grades taught, the sections
+# and periods per day of each grade, and the working days. Sections and
+# periods may be one number for every grade or a {grade: number} dict.
+# Class names and the per-class lookups are built here once instead of
+# on every generation.
+class SchoolConfig:
+    def __init__(self, grades, sections, periods, weekmask):
+        self.grades = list(grades)
+        self.sections = {
+            grade: sections[grade] if isinstance(sections, dict) else sections
+            for grade in self.grades
+        }
+        self.periods = {
+            grade: periods[grade] if isinstance(periods, dict) else periods
+            for grade in self.grades
+        }
+        self.days = [
+            day for day, working in zip(WEEK_DAYS, weekmask) if working == "1"
+        ]
+        self.max_periods = max(self.periods.values())
+        self.section_labels = {
+            grade: [chr(65 + i) for i in range(count)]  # 'A', 'B', ...
+            for grade, count in self.sections.items()
+        }
+        self.classes_by_grade = {
+            grade: [f"{grade}{section}" for section in labels]
+            for grade, labels in self.section_labels.items()
+        }
+        self.classes = [
+            cls for grade in self.grades for cls in self.classes_by_grade[grade]
+        ]
+        self.grade_of = {
+            cls: grade
+            for grade, classes in self.classes_by_grade.items()
+            for cls in classes
+        }
+        self.period_count = {
+            cls: self.periods[grade] for cls, grade in self.grade_of.items()
+        }
+
+
+# Loaded from settings once per process
+@lru_cache(maxsize=1)
+def get_school_config():
+    return SchoolConfig(
+        settings.SCHOOL_GRADES,
+        settings.SCHOOL_SECTIONS,
+        settings.SCHOOL_PERIODS,
+        settings.WORKING_WEEKMASK
+    )
@@ -1,3 +1,1443 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import random
+import tempfile
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from unittest import mock
+import numpy as np
+import pandas as pd
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from education_management import settings
+from users.academic_calendar import get_academic_calendar, working_days
+from users.attendance import upsert_attendance
+from users.attendance_rollups import rebuild_attendance_rollups
+from users.exam_cache import (
+    evict_exam_timetable_cache,
+    exam_timetable_cache_key
+)
+from users.exam_packing import ExamPacker, UnsatisfiableScheduleError
+from users.exam_scheduler import DateOccupancyIndex, ExamScheduler
+from users.jobs import run_timetable_job
+from users.marks_import import (
+    check_grade_boundaries,
+    grade_marks,
+    import_exam_marks
+)
+from users.models import (
+    Administrator,
+    Attendance,
+    Class,
+    ClassDailyAttendance,
+    Exam,
+    ExamTimeTable,
+    JobStatus,
+    Parent,
+    QuestionPaper,
+    Rank,
+    SchoolTimeTable,
+    Student,
+    StudentAssessment,
+    StudentMonthlyAttendance,
+    Subject,
+    Teacher,
+    TimetableJob,
+    TimetableSlot,
+    User
+)
+from users.rankings import rank_students
+from users.roster_cache import evict_teacher_roster_cache
+from users.school_config import SchoolConfig
+from users.timetable_grid import TimetableGrid
+from users.timetable_slots import save_timetable_slots
+from users.timetable_store import (
+    ExamTimetableColumns,
+    get_exam_timetable_columns
+)
+from users.utils import (
+    expand_class_subjects,
+    generate_exam_timetable,
+    incremental_timetable_generation,
+    redistribute_teaching_load,
+    subject_categories,
+    teacher_csv_to_json,
+    timed_exam_timetable_job,
+    timetable_generation,
+    weekly_periods_by_category
+)
 
-# Create your tests here.
+
+SUBJECTS_CSV = """Class,Period,Subject1,Subject2,Subject3,Subject4,Subject5,Subject6,Subject7,Subject8,Subject9,Subject10
+1,5,Mathematics,English,Hindi,Arts,,,,,,
+2,5,Mathematics,English,Hindi,Arts,,,,,,
+3,5,Mathematics,Environmental Studies,English,Hindi,Arts,,,,,
+4,5,Mathematics,Environmental Studies,Science,English,Hindi,Arts,,,,
+5,8,Mathematics,Environmental Studies,Science,English,Hindi,Arts,Health and Physical Education,Sports,,
+6,8,Mathematics,Science,Social Science,English,Hindi,Sanskrit/French,Arts,Health and Physical Education,Music,Sports
+7,8,Mathematics,Science,Social Science,English,Hindi,Sanskrit/French,Arts,Health and Physical Education,Music,Sports
+8,8,Mathematics,Science,Social Science,English,Hindi,Sanskrit/French,Arts,Health and Physical Education,Music,Sports
+9,8,Mathematics,Science,Social Science,Computer Application,English,Hindi,Arts,Health and Physical Education,Music,Sports
+10,8,Mathematics,Science,Social Science,Computer Application,English,Hindi,Arts,Health and Physical Education,Music,Sports
+"""
+
+# Subject -> the grade groups one teacher each covers
+TEACHER_GRADES = {
+    "Mathematics": ["1,2", "3,4", "5,6", "7,8", "9,10"],
+    "Science": ["4,5", "6,7", "8,9", "10"],
+    "Social Science": ["6,7", "8,9", "10"],
+    "English": ["1,2", "3,4", "5,6", "7,8", "9,10"],
+    "Hindi": ["1,2", "3,4", "5,6", "7,8", "9,10"],
+    "Sanskrit/French": ["6,7", "8"],
+    "Environmental Studies": ["3,4", "5"],
+    "Arts": ["1,2", "3,4", "5,6", "7,8", "9,10"],
+    "Health and Physical Education": ["5,6", "7,8", "9,10"],
+    "Music": ["6,7", "8,9", "10"],
+    "Sports": ["5,6", "7,8", "9,10"],
+    "Computer Application": ["9,10"],
+}
+
+
+def school_config():
+    return SchoolConfig(
+        list(range(1, 11)),
+        4,
+        {grade: 5 if grade <= 4 else 8 for grade in range(1, 11)},
+        "1111110"
+    )
+
+
+def write_teachers_csv(directory, rows=None):
+    if rows is None:
+        rows = [
+            (f"{subject} {number}", grades, subject)
+            for subject, groups in TEACHER_GRADES.items()
+            for number, grades in enumerate(groups, start=1)
+        ]
+    path = os.path.join(directory, "teachers.csv")
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["teacher", "classes", "subjects"])
+        writer.writerows(rows)
+    return path
+
+
+# Point MEDIA_ROOT at a temporary directory for one test, both for our
+# modules and for FileField storage
+def temporary_media_root(test_case):
+    directory = tempfile.TemporaryDirectory()
+    test_case.addCleanup(directory.cleanup)
+    patcher = mock.patch.object(settings, "MEDIA_ROOT", directory.name)
+    patcher.start()
+    test_case.addCleanup(patcher.stop)
+    storage = override_settings(MEDIA_ROOT=directory.name)
+    storage.enable()
+    test_case.addCleanup(storage.disable)
+    return directory.name
+
+
+# Class timetables are generated against a fixed school shape, with the
+# teacher roster cache in a temporary MEDIA_ROOT
+class ClassTimetableTestCase(SimpleTestCase):
+    def setUp(self):
+        self.directory = temporary_media_root(self)
+        self.config = school_config()
+        self.teachers_csv = write_teachers_csv(self.directory)
+
+    def generate_grids(
+            self,
+            solver=False,
+            subjects=SUBJECTS_CSV,
+            processes=1
+        ):
+        return timetable_generation(
+            io.StringIO(subjects),
+            self.teachers_csv,
+            processes=processes,
+            solver=solver,
+            config=self.config,
+            seed=1
+        )
+
+    def generate(self, solver=False, subjects=SUBJECTS_CSV):
+        class_timetable, teachers_timetable, roster, metrics = (
+            self.generate_grids(solver, subjects)
+        )
+        # Stored the way a finished job keeps it
+        return json.loads(json.dumps({
+            "class_timetable": class_timetable.to_dict(),
+            "teachers_timetable": teachers_timetable.to_dict(),
+            "roster": roster,
+            "metrics": metrics,
+            "teacher_periods": class_timetable.teacher_periods_dict()
+        }))
+
+    def regenerate(self, previous, solver=False, subjects=SUBJECTS_CSV):
+        return incremental_timetable_generation(
+            io.StringIO(subjects),
+            self.teachers_csv,
+            previous,
+            solver=solver,
+            config=self.config,
+            seed=1
+        )
+
+
+class IncrementalTimetableTests(ClassTimetableTestCase):
+    def test_unchanged_input_gives_empty_delta(self):
+        for solver in (False, True):
+            with self.subTest(solver=solver):
+                previous = self.generate(solver=solver)
+                class_timetable, teachers_timetable, _, _, delta = (
+                    self.regenerate(previous, solver=solver)
+                )
+                self.assertEqual(
+                    delta,
+                    {"classes": {}, "teachers": {}, "removed_teachers": []}
+                )
+                self.assertEqual(
+                    class_timetable.to_dict(),
+                    previous["class_timetable"]
+                )
+                self.assertEqual(
+                    teachers_timetable.to_dict(),
+                    previous["teachers_timetable"]
+                )
+
+    def test_changed_subjects_regenerate_every_class(self):
+        previous = self.generate()
+        subjects = SUBJECTS_CSV.replace(
+            "1,5,Mathematics,English,Hindi,Arts",
+            "1,5,Mathematics,English,Hindi,Music"
+        )
+        class_timetable, _, roster, _, delta = self.regenerate(
+            previous,
+            subjects=subjects
+        )
+        self.assertEqual(roster["subjects_by_grade"]["1"][-1], "Music")
+        for cls in ("1A", "1B", "1C", "1D"):
+            week = class_timetable.to_dict()[cls]
+            self.assertIn(cls, delta["classes"])
+            self.assertIn(
+                "Music",
+                [subject for periods in week.values() for subject in periods]
+            )
+
+    def test_seeded_teacher_change_is_repeatable(self):
+        previous = self.generate()
+        class_teacher = previous["roster"]["class_teachers"]["9A"]
+        write_teachers_csv(self.directory, [
+            (f"{subject} {number}", grades, subject)
+            for subject, groups in TEACHER_GRADES.items()
+            for number, grades in enumerate(groups, start=1)
+            if f"{subject} {number}" != class_teacher
+        ])
+        runs = []
+        for _ in range(3):
+            class_timetable, teachers_timetable, roster, _, delta = (
+                self.regenerate(previous)
+            )
+            runs.append((
+                class_timetable.to_dict(),
+                teachers_timetable.to_dict(),
+                roster,
+                delta
+            ))
+        self.assertIn("9A", runs[0][3]["classes"])
+        self.assertEqual(runs[1], runs[0])
+        self.assertEqual(runs[2], runs[0])
+
+
+class ClassTimetableTests(ClassTimetableTestCase):
+    def test_grade_bands_in_worker_processes_match_one_process(self):
+        class_timetable, teachers_timetable, _, _ = self.generate_grids()
+        # Started from a thread, as background jobs are
+        with ThreadPoolExecutor(max_workers=1) as job_thread:
+            parallel, parallel_teachers, _, _ = job_thread.submit(
+                self.generate_grids,
+                processes=3
+            ).result()
+        self.assertEqual(parallel.to_dict(), class_timetable.to_dict())
+        self.assertEqual(
+            parallel_teachers.to_dict(),
+            teachers_timetable.to_dict()
+        )
+
+    def test_class_without_class_teacher_keeps_first_period_free(self):
+        generated = self.generate()
+        class_teachers = generated["roster"]["class_teachers"]
+        without = [
+            cls for cls in self.config.classes if cls not in class_teachers
+        ]
+        self.assertTrue(without)
+        subjects = set(SUBJECTS_CSV.replace("\n", ",").split(","))
+        for cls, week in generated["class_timetable"].items():
+            for day, periods in week.items():
+                self.assertTrue(set(periods) <= subjects | {""})
+                # Saturday's free periods are topped up with main subjects
+                if cls in without and day != "saturday":
+                    self.assertEqual(periods[0], "")
+
+    def test_solver_keeps_class_and_teacher_grids_in_step(self):
+        before = self.generate()["class_timetable"]
+        generated = self.generate(solver=True)
+        class_subjects = generated["roster"]["class_subjects"]
+        teachers = generated["teachers_timetable"]
+        booked = Counter(
+            (teacher, day, period, cls)
+            for teacher, week in teachers.items()
+            for day, periods in week.items()
+            for period, cls in enumerate(periods)
+            if cls
+        )
+        lessons = Counter()
+        for cls, week in generated["class_timetable"].items():
+            for day, periods in week.items():
+                for period, subject in enumerate(periods):
+                    teacher = class_subjects.get(cls, {}).get(subject)
+                    if subject and teacher:
+                        lessons[(teacher, day, period, cls)] += 1
+        self.assertEqual(lessons, booked)
+
+        # Every lesson is either still in the class grid or reported
+        def subjects(timetable):
+            return Counter(
+                (cls, subject)
+                for cls, week in timetable.items()
+                for periods in week.values()
+                for subject in periods
+                if subject
+            )
+        dropped = Counter(
+            (lesson["class"], lesson["subject"])
+            for lesson in generated["metrics"]["dropped_lessons"]
+        )
+        self.assertEqual(
+            subjects(before),
+            subjects(generated["class_timetable"]) + dropped
+        )
+
+        # The class teacher's first period is pinned unless two pinned
+        # cells needed the same teacher at once
+        main_subjects = generated["roster"]["main_subjects"]
+        kept = sum(
+            generated["class_timetable"][cls][day][0] == subject
+            for cls, subject in main_subjects.items()
+            for day, periods in before[cls].items()
+            if periods[0] == subject
+        )
+        pinned = sum(
+            periods[0] == subject
+            for cls, subject in main_subjects.items()
+            for periods in before[cls].values()
+        )
+        self.assertGreater(kept, 0.9 * pinned)
+
+
+class TeacherRosterTests(ClassTimetableTestCase):
+    def test_sections_are_expanded_once(self):
+        teacher = {
+            "name": "Mathematics 5",
+            "role": "normal",
+            "level": "higher",
+            "class_subjects": [
+                ["9", "Mathematics"],
+                ["9A", "General Knowledge"],
+                ["10", "Mathematics"]
+            ]
+        }
+        [expanded] = expand_class_subjects([teacher], config=self.config)
+        self.assertEqual(expanded["class_subjects"], [
+            ["9A", "Mathematics"],
+            ["9B", "Mathematics"],
+            ["9C", "Mathematics"],
+            ["9D", "Mathematics"],
+            ["9A", "General Knowledge"],
+            ["10A", "Mathematics"],
+            ["10B", "Mathematics"],
+            ["10C", "Mathematics"],
+            ["10D", "Mathematics"]
+        ])
+
+    def test_roster_only_names_real_classes(self):
+        teachers = teacher_csv_to_json(
+            self.teachers_csv,
+            config=self.config,
+            seed=1
+        )
+        general_knowledge = [
+            cls
+            for teacher in teachers
+            for cls, subject in teacher["class_subjects"]
+            if subject == "General Knowledge"
+        ]
+        self.assertEqual(
+            sorted(general_knowledge),
+            sorted(
+                self.config.classes_by_grade[9] +
+                self.config.classes_by_grade[10]
+            )
+        )
+        self.assertTrue(all(
+            cls in self.config.grade_of
+            for teacher in teachers
+            for cls, _ in teacher["class_subjects"]
+        ))
+
+    def test_identical_upload_reuses_the_compiled_roster(self):
+        teachers = teacher_csv_to_json(
+            self.teachers_csv,
+            config=self.config,
+            seed=1
+        )
+        teachers[0]["class_subjects"].clear()
+
+        # Uploads are stored under a new name each time
+        upload = os.path.join(self.directory, "teachers_Ab12Cd.csv")
+        with open(self.teachers_csv, "rb") as source:
+            with open(upload, "wb") as copy:
+                copy.write(source.read())
+        with mock.patch("users.utils.read_teachers_from_csv") as read_csv:
+            cached = teacher_csv_to_json(upload, config=self.config, seed=1)
+        read_csv.assert_not_called()
+        self.assertEqual(cached[1:], teachers[1:])
+        self.assertNotEqual(cached[0]["class_subjects"], [])
+        self.assertEqual(
+            len(os.listdir(os.path.join(self.directory, "teacher_rosters"))),
+            1
+        )
+
+        # Another seed compiles (and caches) its own roster
+        teacher_csv_to_json(upload, config=self.config, seed=2)
+        self.assertEqual(
+            len(os.listdir(os.path.join(self.directory, "teacher_rosters"))),
+            2
+        )
+
+    def test_old_rosters_are_evicted(self):
+        cache_dir = os.path.join(self.directory, "teacher_rosters")
+        os.makedirs(cache_dir)
+        for name, age in (("old", 100), ("kept", 100), ("new", 10)):
+            path = os.path.join(cache_dir, f"{name}.json")
+            with open(path, "w") as file:
+                file.write("[]")
+            used = time.time() - age
+            os.utime(path, (used, used))
+        self.assertEqual(
+            evict_teacher_roster_cache(max_age=50, keep=["kept.json"]),
+            ["old.json"]
+        )
+        self.assertEqual(
+            evict_teacher_roster_cache(max_age=1000, max_bytes=2),
+            ["kept.json"]
+        )
+        self.assertEqual(os.listdir(cache_dir), ["new.json"])
+
+
+class TeachingLoadTests(SimpleTestCase):
+    def teacher(self, name, classes, subject="Mathematics"):
+        return {
+            "name": name,
+            "role": "normal",
+            "level": "higher",
+            "class_subjects": [[cls, subject] for cls in classes]
+        }
+
+    def load(self, teacher):
+        return sum(
+            weekly_periods_by_category[subject_categories[subject]]
+            for _, subject in teacher["class_subjects"]
+        )
+
+    def test_busiest_teacher_hands_lessons_to_qualified_teachers(self):
+        teachers = [
+            self.teacher("A", ["6A", "6B", "6C", "6D", "7A", "7B", "7C"]),
+            self.teacher("B", ["8A"]),
+            self.teacher("C", ["9A"]),
+            self.teacher("D", ["9B"], subject="Music"),
+        ]
+        before = {
+            tuple(pair)
+            for teacher in teachers
+            for pair in teacher["class_subjects"]
+        }
+        first = [teacher["class_subjects"][0] for teacher in teachers]
+        balanced = redistribute_teaching_load(teachers, max_spread=6)
+
+        self.assertEqual(
+            {
+                tuple(pair)
+                for teacher in balanced
+                for pair in teacher["class_subjects"]
+            },
+            before
+        )
+        self.assertEqual(
+            [teacher["class_subjects"][0] for teacher in balanced],
+            first
+        )
+        # Music can't take Mathematics, so only A, B and C balance
+        self.assertEqual(balanced[3]["class_subjects"], [["9B", "Music"]])
+        loads = [self.load(teacher) for teacher in balanced[:3]]
+        self.assertLessEqual(max(loads) - min(loads), 6)
+
+
+class TimetableGridTests(ClassTimetableTestCase):
+    def grid(self):
+        grid = TimetableGrid(["T1", "T2", "T3"], ["monday", "tuesday"], 3)
+        grid.set_period_count("T3", 2)
+        grid.load_dict({
+            "T1": {"monday": ["1A", "", "2A"], "tuesday": ["1B", "1A", ""]},
+            "T2": {"monday": ["1A", "2A", "2A"], "tuesday": ["", "1A", ""]},
+            "T3": {"monday": ["", ""], "tuesday": ["3A", "1A"]},
+        })
+        return grid
+
+    def test_clashes_list_every_double_booked_cell(self):
+        self.assertEqual(self.grid().clashes(), [
+            ("T1", "monday", 0),
+            ("T2", "monday", 0),
+            ("T1", "monday", 2),
+            ("T2", "monday", 2),
+            ("T1", "tuesday", 1),
+            ("T2", "tuesday", 1),
+            ("T3", "tuesday", 1),
+        ])
+        self.assertEqual(TimetableGrid([], ["monday"], 3).clashes(), [])
+
+    def test_exports_agree(self):
+        grid = self.grid()
+        self.assertEqual(json.loads(grid.to_json()), grid.to_dict())
+        file = io.StringIO()
+        grid.to_csv(file, entities=["T3"])
+        self.assertEqual(
+            file.getvalue().splitlines(),
+            [
+                "Entity,Day,Period,Value",
+                "T3,monday,1,",
+                "T3,monday,2,",
+                "T3,tuesday,1,3A",
+                "T3,tuesday,2,1A",
+            ]
+        )
+
+    def test_generation_reports_class_clashes(self):
+        for solver in (False, True):
+            _, teachers_timetable, _, metrics = self.generate_grids(solver)
+            busy = Counter(
+                (day, period, cls)
+                for week in teachers_timetable.to_dict().values()
+                for day, periods in week.items()
+                for period, cls in enumerate(periods)
+                if cls
+            )
+            self.assertEqual(
+                metrics["class_clashes"],
+                sum(count for count in busy.values() if count > 1)
+            )
+
+
+class TimetableSlotTests(ClassTimetableTestCase, TestCase):
+    def save(self, class_timetable, teachers_timetable, roster):
+        school_timetable = SchoolTimeTable.objects.create()
+        save_timetable_slots(
+            school_timetable,
+            class_timetable,
+            teachers_timetable,
+            roster
+        )
+        return TimetableSlot.objects.filter(school_timetable=school_timetable)
+
+    def assert_slots_match(self, slots, class_timetable, teachers_timetable):
+        booked = {
+            (teacher, day, period + 1): cls
+            for teacher, week in teachers_timetable.to_dict().items()
+            for day, periods in week.items()
+            for period, cls in enumerate(periods)
+            if cls
+        }
+        with_period = slots.exclude(teacher_period=None)
+        self.assertEqual(with_period.count(), len(booked))
+        self.assertEqual(
+            {
+                (slot.teacher, slot.day, slot.teacher_period): slot.class_name
+                for slot in with_period
+            },
+            booked
+        )
+        self.assertEqual(
+            {
+                (slot.class_name, slot.day, slot.period): slot.subject
+                for slot in slots
+            },
+            {
+                (cls, day, period + 1): subject
+                for cls, week in class_timetable.to_dict().items()
+                for day, periods in week.items()
+                for period, subject in enumerate(periods)
+                if subject
+            }
+        )
+
+    def test_teacher_lookups_match_the_teacher_grid(self):
+        for solver in (False, True):
+            class_timetable, teachers_timetable, roster, _ = (
+                self.generate_grids(solver)
+            )
+            self.assert_slots_match(
+                self.save(class_timetable, teachers_timetable, roster),
+                class_timetable,
+                teachers_timetable
+            )
+
+    def test_incremental_run_keeps_copied_teacher_periods(self):
+        previous = self.generate()
+        write_teachers_csv(self.directory, [
+            (f"{subject} {number}", grades, subject)
+            for subject, groups in TEACHER_GRADES.items()
+            for number, grades in enumerate(groups, start=1)
+            if f"{subject} {number}" != "Music 2"
+        ])
+        class_timetable, teachers_timetable, roster, _, delta = (
+            self.regenerate(previous)
+        )
+        self.assertIn("Music 2", delta["removed_teachers"])
+        self.assert_slots_match(
+            self.save(class_timetable, teachers_timetable, roster),
+            class_timetable,
+            teachers_timetable
+        )
+
+    def test_slots_follow_the_booked_period_not_lesson_order(self):
+        class_timetable = TimetableGrid(["1A"], ["monday"], 3)
+        class_timetable.load_dict(
+            {"1A": {"monday": ["Mathematics", "", "Mathematics"]}}
+        )
+        teachers_timetable = TimetableGrid(["Mathematics 1"], ["monday"], 3)
+        teachers_timetable.load_dict(
+            {"Mathematics 1": {"monday": ["1A", "", "1A"]}}
+        )
+        # The booking swapped the two lessons
+        class_timetable.load_teacher_periods(
+            {"1A": {"monday": [2, None, 0]}}
+        )
+        slots = self.save(
+            class_timetable,
+            teachers_timetable,
+            {"class_subjects": {"1A": {"Mathematics": "Mathematics 1"}}}
+        )
+        self.assertEqual(
+            sorted(slots.values_list("period", "teacher_period")),
+            [(1, 3), (3, 1)]
+        )
+
+
+# The original exam scheduler: each class walks a copy of the date list,
+# skipping the gap and then any date that already has the subject
+def baseline_exam_positions(num_slots, classes):
+    written = defaultdict(set)
+    for subjects in classes:
+        dates = list(range(num_slots))
+        if len(dates) > len(subjects):
+            gap_days = (len(dates) - len(subjects)) // len(subjects)
+        else:
+            gap_days = 0
+        positions = []
+        for subject in subjects:
+            if positions:
+                del dates[:min(gap_days, len(dates))]
+                for i, slot in enumerate(dates):
+                    if subject not in written[slot]:
+                        break
+                else:
+                    i = 0
+                dates = dates[i:]
+            if dates:
+                slot = dates.pop(0)
+                positions.append(slot)
+                written[slot].add(subject)
+        yield positions
+
+
+SUBJECTS = list(TEACHER_GRADES)
+
+
+def random_classes(rng, count, most=8):
+    return [
+        rng.sample(SUBJECTS, rng.randint(1, most)) for _ in range(count)
+    ]
+
+
+class ExamSchedulerTests(SimpleTestCase):
+    def test_placement_matches_the_baseline(self):
+        rng = random.Random(7)
+        for num_slots in (3, 8, 20, 45):
+            classes = random_classes(rng, 30)
+            scheduler = ExamScheduler(
+                np.arange(num_slots) + np.datetime64("2025-03-03")
+            )
+            self.assertEqual(
+                [
+                    scheduler.schedule_class(str(index), subjects)
+                    for index, subjects in enumerate(classes)
+                ],
+                list(baseline_exam_positions(num_slots, classes))
+            )
+
+    def test_occupancy_index_matches_a_set_scan(self):
+        rng = random.Random(3)
+        index = DateOccupancyIndex()
+        used = set()
+        for _ in range(2000):
+            slot = rng.randrange(60)
+            if rng.random() < 0.5:
+                index.mark("Mathematics", slot)
+                used.add(slot)
+            free = slot
+            while free in used:
+                free += 1
+            self.assertEqual(index.next_free_slot("Mathematics", slot), free)
+        self.assertEqual(index.next_free_slot("Science", 5), 5)
+
+
+class ExamPackerTests(SimpleTestCase):
+    def pack(self, classes, num_days, **options):
+        packer = ExamPacker(
+            np.arange(num_days) + np.datetime64("2025-03-03"),
+            **options
+        )
+        for index, subjects in enumerate(classes):
+            packer.add_class(index, subjects)
+        return packer.solve()
+
+    def test_packed_timetable_keeps_every_constraint(self):
+        rng = random.Random(11)
+        for max_exams_per_day, min_gap_days in ((None, 0), (6, 0), (4, 1)):
+            classes = random_classes(rng, 15, most=6)
+            timetable = self.pack(
+                classes,
+                60,
+                max_exams_per_day=max_exams_per_day,
+                min_gap_days=min_gap_days
+            )
+            days = pd.to_datetime(timetable["Date"], format="%d-%b-%Y")
+            self.assertFalse(timetable.duplicated(["Date", "Subject"]).any())
+            self.assertTrue(
+                timetable["Session"].isin(["Morning", "Afternoon"]).all()
+            )
+            if max_exams_per_day:
+                self.assertLessEqual(
+                    days.value_counts().max(),
+                    max_exams_per_day
+                )
+            for index, subjects in enumerate(classes):
+                rows = timetable["Class"] == index
+                self.assertEqual(
+                    timetable.loc[rows, "Subject"].tolist(),
+                    subjects
+                )
+                gaps = days[rows].diff().dropna().dt.days
+                self.assertTrue((gaps >= min_gap_days + 1).all())
+
+    def test_packing_uses_fewer_days_than_the_window(self):
+        classes = [SUBJECTS[:5]] * 4
+        timetable = self.pack(classes, 30)
+        # Four classes share each subject, so each needs four dates
+        self.assertEqual(timetable["Date"].nunique(), 8)
+
+    def test_too_few_dates_is_unsatisfiable(self):
+        with self.assertRaises(UnsatisfiableScheduleError) as raised:
+            self.pack([["Mathematics"]] * 4, 3)
+        self.assertIn("Mathematics", str(raised.exception))
+
+
+EXAM_SUBJECTS_CSV = b"""Class,Subject1,Subject2,Subject3
+9,Mathematics,Science,English
+10,Mathematics,Science,Hindi
+"""
+
+
+# Exam timetables are cached under a temporary MEDIA_ROOT
+class ExamCacheTests(TestCase):
+    def setUp(self):
+        self.cache_dir = os.path.join(
+            temporary_media_root(self),
+            "exam_timetables"
+        )
+        os.makedirs(self.cache_dir)
+
+    def key(self, content=EXAM_SUBJECTS_CSV, name="subjects.csv", **options):
+        upload = SimpleUploadedFile(name, content)
+        key = exam_timetable_cache_key(
+            upload,
+            "2025-03-03",
+            "2025-03-28",
+            0,
+            **options
+        )
+        self.assertEqual(upload.read(), content)
+        return key
+
+    def cache_file(self, name, age, size=10):
+        path = os.path.join(self.cache_dir, name)
+        with open(path, "wb") as file:
+            file.write(b"x" * size)
+        used = time.time() - age
+        os.utime(path, (used, used))
+        if name.endswith(".csv"):
+            ExamTimeTable.objects.create(
+                start_date="2025-03-03",
+                end_date="2025-03-28",
+                uploaded_csv="subjects.csv",
+                generated_timetable_csv=f"exam_timetables/{name}"
+            )
+
+    def test_key_follows_content_and_options_not_file_name(self):
+        key = self.key(blackout_dates=["2025-03-14", "2025-03-10"])
+        self.assertEqual(
+            key,
+            self.key(
+                name="subjects_Xy12.csv",
+                blackout_dates=["2025-03-10", "2025-03-14"]
+            )
+        )
+        self.assertNotEqual(key, self.key())
+        self.assertEqual(self.key(), self.key(packed=False, min_gap_days=0))
+        self.assertNotEqual(self.key(), self.key(packed=True))
+        self.assertNotEqual(
+            self.key(),
+            self.key(content=EXAM_SUBJECTS_CSV.replace(b"Hindi", b"Music"))
+        )
+
+    def test_eviction_drops_old_files_then_least_recently_used(self):
+        self.cache_file("old.csv", age=100)
+        self.cache_file("old.csv.npz", age=100)
+        self.cache_file("kept.csv", age=100)
+        self.cache_file("used.csv", age=20)
+        self.cache_file("recent.csv", age=10)
+
+        evicted = evict_exam_timetable_cache(
+            max_age=50,
+            max_bytes=20,
+            keep=["exam_timetables/kept.csv"]
+        )
+        self.assertEqual(
+            evicted,
+            ["exam_timetables/old.csv", "exam_timetables/used.csv"]
+        )
+        self.assertEqual(
+            sorted(os.listdir(self.cache_dir)),
+            ["kept.csv", "recent.csv"]
+        )
+        self.assertEqual(
+            ExamTimeTable.objects.filter(
+                generated_timetable_csv=None
+            ).count(),
+            2
+        )
+        # Kept files are only spared for the run that keeps them
+        self.assertEqual(
+            evict_exam_timetable_cache(max_age=50, max_bytes=20),
+            ["exam_timetables/kept.csv"]
+        )
+
+
+class ExamTimetableErrorTests(TestCase):
+    def setUp(self):
+        self.directory = temporary_media_root(self)
+
+    def subjects_csv(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, "wb") as file:
+            file.write(content)
+        return path
+
+    def test_job_reports_the_broken_constraint(self):
+        path = self.subjects_csv(
+            "subjects.csv",
+            b"Class,Subject1\n" + b"".join(
+                b"%d,Mathematics\n" % grade for grade in range(1, 5)
+            )
+        )
+        generated_csv_path, _, error_message = timed_exam_timetable_job(
+            (path, "2025-03-03", "2025-03-05", {"packed": True})
+        )
+        self.assertIsNone(generated_csv_path)
+        self.assertIn("UnsatisfiableScheduleError", error_message)
+        self.assertIn("Mathematics is written by 4 classes", error_message)
+        self.assertEqual(
+            os.listdir(os.path.join(self.directory, "exam_timetables")),
+            []
+        )
+
+    def test_command_fails_with_each_cause(self):
+        good = self.subjects_csv("good.csv", EXAM_SUBJECTS_CSV)
+        empty = self.subjects_csv("empty.csv", b"")
+        # Threads instead of processes, so the workers see the test's
+        # MEDIA_ROOT
+        with mock.patch(
+            "users.management.commands.generate_exam_timetables."
+            "process_pool",
+            ThreadPoolExecutor
+        ):
+            with self.assertRaises(CommandError) as raised:
+                call_command(
+                    "generate_exam_timetables",
+                    good,
+                    empty,
+                    "--start-date=2025-03-03",
+                    "--end-date=2025-03-28",
+                    "--workers=1",
+                    stdout=io.StringIO(),
+                    stderr=io.StringIO()
+                )
+        message = str(raised.exception)
+        self.assertIn("Generated 1 of 2 timetables", message)
+        self.assertRegex(message, r"empty\w*\.csv: EmptyDataError")
+        self.assertEqual(
+            ExamTimeTable.objects.filter(
+                generated_timetable_csv__startswith="exam_timetables/"
+            ).count(),
+            1
+        )
+
+
+class AcademicCalendarTests(SimpleTestCase):
+    def test_working_days_match_a_day_by_day_walk(self):
+        start, end = date(2025, 1, 20), date(2025, 8, 20)
+        blackout_dates = ["2025-05-02", "2025-03-31"]
+        closed = set(settings.PUBLIC_HOLIDAYS) | set(blackout_dates)
+        expected = []
+        day = start
+        while day <= end:
+            if (
+                settings.WORKING_WEEKMASK[day.weekday()] == "1" and
+                day.isoformat() not in closed
+            ):
+                expected.append(day)
+            day += timedelta(days=1)
+
+        # The range spans two academic years (the year starts in April)
+        days = working_days(start, end, blackout_dates)
+        self.assertEqual(days.astype(object).tolist(), expected)
+        self.assertNotIn(date(2025, 3, 31), expected)
+        self.assertNotIn(date(2025, 8, 15), expected)
+
+    def test_calendars_are_shared_per_year_and_blackout_dates(self):
+        working_days("2025-06-02", "2025-06-06", ["2025-06-03"])
+        calendar = get_academic_calendar(2025, ("2025-06-03",))
+        working_days("2025-06-09", "2025-06-13", ["2025-06-03"])
+        self.assertIs(
+            get_academic_calendar(2025, ("2025-06-03",)),
+            calendar
+        )
+        self.assertIsNot(get_academic_calendar(2025), calendar)
+        self.assertEqual(
+            len(working_days("2025-06-02", "2025-06-07", ["2025-06-03"])),
+            5
+        )
+
+
+class TimetableJobTests(TestCase):
+    def setUp(self):
+        self.directory = temporary_media_root(self)
+        # Jobs run in this thread here, so keep the test's connection
+        patcher = mock.patch("users.jobs.connection")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def upload(self, content):
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(
+                reverse("edupilot:examtimetable"),
+                {
+                    "start-date": "2025-03-03",
+                    "end-date": "2025-03-28",
+                    "csv-upload": SimpleUploadedFile("subjects.csv", content)
+                }
+            )
+        self.assertEqual(len(callbacks), 1)
+        return response.context["job_id"]
+
+    def status(self, job_id):
+        response = self.client.get(
+            reverse("edupilot:timetablejobstatus", args=[job_id])
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_upload_runs_as_a_job_the_status_endpoint_reports(self):
+        job_id = self.upload(EXAM_SUBJECTS_CSV)
+        self.assertEqual(self.status(job_id)["status"], JobStatus.PENDING)
+
+        run_timetable_job(job_id)
+        job = self.status(job_id)
+        self.assertEqual(job["status"], JobStatus.DONE)
+        self.assertTrue(os.path.exists(os.path.join(
+            self.directory,
+            job["result"]["generated_csv_path"]
+        )))
+
+        # The same upload is served from the cache without a new job
+        response = self.client.post(
+            reverse("edupilot:examtimetable"),
+            {
+                "start-date": "2025-03-03",
+                "end-date": "2025-03-28",
+                "csv-upload": SimpleUploadedFile(
+                    "subjects.csv",
+                    EXAM_SUBJECTS_CSV
+                )
+            }
+        )
+        self.assertEqual(response.context["job_id"], "")
+        self.assertEqual(
+            response.context["generated_csv_path"],
+            job["result"]["generated_csv_path"]
+        )
+
+    def test_failed_job_keeps_the_cause(self):
+        job_id = self.upload(b"Class,Subject1\nNine,Mathematics\n")
+        with mock.patch("users.jobs.traceback.print_exc"):
+            run_timetable_job(job_id)
+        job = self.status(job_id)
+        self.assertEqual(job["status"], JobStatus.FAILED)
+        self.assertIsNone(job["result"])
+        self.assertIn("'Nine'", job["error_message"])
+
+    def test_unknown_job_is_not_found(self):
+        response = self.client.get(reverse(
+            "edupilot:timetablejobstatus",
+            args=[ExamTimeTable().id]
+        ))
+        self.assertEqual(response.status_code, 404)
+
+    def test_stale_jobs_can_be_marked_failed(self):
+        stale = TimetableJob.objects.create(kind="EXAM")
+        TimetableJob.objects.filter(id=stale.id).update(
+            updated_at=timezone.now() - timedelta(hours=1)
+        )
+        live = TimetableJob.objects.create(kind="EXAM")
+        call_command("requeue_timetable_jobs", "--fail", stdout=io.StringIO())
+        stale.refresh_from_db()
+        live.refresh_from_db()
+        self.assertEqual(stale.status, JobStatus.FAILED)
+        self.assertEqual(live.status, JobStatus.PENDING)
+
+
+class ExamTimetablePageTests(TestCase):
+    def setUp(self):
+        self.directory = temporary_media_root(self)
+        subjects_csv = os.path.join(self.directory, "subjects.csv")
+        rng = random.Random(4)
+        with open(subjects_csv, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["Class"] + [f"Subject{i}" for i in range(1, 7)])
+            for grade in range(1, 13):
+                writer.writerow([grade] + rng.sample(SUBJECTS, 6))
+        self.generated_csv_path = generate_exam_timetable(
+            subjects_csv,
+            "2025-03-03",
+            "2025-03-28",
+            seed=0
+        )
+        self.csv_path = os.path.join(
+            self.directory,
+            self.generated_csv_path
+        )
+        self.timetable = pd.read_csv(
+            self.csv_path,
+            dtype=str,
+            keep_default_na=False
+        )
+
+    def test_filters_match_the_csv(self):
+        columns = get_exam_timetable_columns(self.csv_path)
+        self.assertTrue(os.path.exists(f"{self.csv_path}.npz"))
+        self.assertEqual(
+            columns.choices("Class"),
+            [str(grade) for grade in range(1, 13)]
+        )
+        for criteria in (
+            {},
+            {"Class": "10"},
+            {"Subject": "Mathematics"},
+            {"Class": "3", "Subject": SUBJECTS[0]},
+            {"Date": self.timetable["Date"].iloc[-1]},
+            {"Class": "13"},
+        ):
+            expected = self.timetable
+            for column, value in criteria.items():
+                expected = expected[expected[column] == value]
+            for loaded in (
+                columns,
+                ExamTimetableColumns.load(f"{self.csv_path}.npz")
+            ):
+                self.assertEqual(
+                    loaded.rows(loaded.filter(criteria)),
+                    expected.to_dict("records")
+                )
+
+    def test_view_shows_one_filtered_page(self):
+        exam_timetable = ExamTimeTable.objects.create(
+            start_date="2025-03-03",
+            end_date="2025-03-28",
+            uploaded_csv="subjects.csv",
+            generated_timetable_csv=self.generated_csv_path
+        )
+        with mock.patch.object(settings, "EXAM_TIMETABLE_PAGE_SIZE", 4):
+            response = self.client.get(reverse("edupilot:examtimetable"), {
+                "exam_timetable": exam_timetable.id,
+                "class": "10",
+                "page": 2
+            })
+        expected = self.timetable[self.timetable["Class"] == "10"]
+        self.assertEqual(
+            response.context["timetable_data"],
+            expected.iloc[4:8].to_dict("records")
+        )
+        self.assertEqual(response.context["page"].paginator.count, 6)
+        self.assertEqual(response.context["filters"], {"class": "10"})
+
+
+def create_class(name, division="A", students=0):
+    school_class = Class.objects.create(class_name=name, division=division)
+    for roll_number in range(1, students + 1):
+        user = User.objects.create_user(
+            f"{name}{division}{roll_number}@example.com",
+            role="student"
+        )
+        Student.objects.create(
+            user=user,
+            first_name="Student",
+            last_name=str(roll_number),
+            roll_number=roll_number,
+            class_enrolled=school_class
+        )
+    return school_class
+
+
+class AttendanceTests(TestCase):
+    def setUp(self):
+        self.classes = [create_class("5", division, 6) for division in "AB"]
+        self.days = [date(2025, 1, 30), date(2025, 1, 31), date(2025, 2, 3)]
+
+    def records(self, rng):
+        return [
+            (student.id, student.class_enrolled_id, day, rng.random() < 0.7)
+            for student in Student.objects.all()
+            for day in self.days
+        ]
+
+    def rollups(self):
+        return (
+            sorted(ClassDailyAttendance.objects.values_list(
+                "class_attended_id",
+                "date_of_attendance",
+                "present",
+                "total"
+            )),
+            sorted(StudentMonthlyAttendance.objects.values_list(
+                "student_id",
+                "month",
+                "present",
+                "total"
+            ))
+        )
+
+    def test_uploading_again_overwrites(self):
+        rng = random.Random(1)
+        upsert_attendance(self.records(rng))
+        second = self.records(rng)
+        upsert_attendance(second, batch_size=5)
+        self.assertEqual(Attendance.objects.count(), len(second))
+        self.assertEqual(
+            Attendance.objects.filter(is_present=True).count(),
+            sum(is_present for *_, is_present in second)
+        )
+
+    def test_rollups_match_a_full_rebuild(self):
+        rng = random.Random(2)
+        upsert_attendance(self.records(rng))
+        upsert_attendance(self.records(rng)[:20])
+
+        # Single-row writes: a flip, a move to another day, a soft delete
+        # and a hard delete
+        attendances = list(Attendance.objects.order_by("id")[:4])
+        attendances[0].is_present = not attendances[0].is_present
+        attendances[0].save()
+        attendances[1].date_of_attendance = date(2025, 2, 4)
+        attendances[1].save()
+        attendances[2].is_deleted = True
+        attendances[2].save()
+        attendances[3].delete()
+
+        incremental = self.rollups()
+        rebuild_attendance_rollups()
+        self.assertEqual(self.rollups(), incremental)
+        self.assertEqual(
+            sum(total for *_, total in incremental[0]),
+            Attendance.active.count()
+        )
+
+    def test_emptied_keys_lose_their_rollups(self):
+        student = Student.objects.first()
+        upsert_attendance([
+            (student.id, student.class_enrolled_id, day, True)
+            for day in self.days
+        ])
+        attendance = Attendance.objects.get(date_of_attendance=self.days[2])
+        attendance.date_of_attendance = date(2025, 3, 3)
+        attendance.save()
+        Attendance.objects.get(date_of_attendance=self.days[0]).delete()
+        self.assertEqual(self.rollups(), (
+            [
+                (student.class_enrolled_id, self.days[1], 1, 1),
+                (student.class_enrolled_id, date(2025, 3, 3), 1, 1),
+            ],
+            [
+                (student.id, date(2025, 1, 1), 1, 1),
+                (student.id, date(2025, 3, 1), 1, 1),
+            ]
+        ))
+
+    def test_api_takes_a_bearer_token_without_csrf(self):
+        client = Client(enforce_csrf_checks=True)
+        class_day = json.dumps({
+            "class_id": str(self.classes[0].id),
+            "date": "2025-01-30",
+            "present": [1, 2, 3]
+        })
+        with mock.patch.object(settings, "ATTENDANCE_API_TOKEN", "s3cret"):
+            for authorization, status in (
+                ("", 401),
+                ("Bearer wrong", 401),
+                ("Bearer s3cret", 200),
+            ):
+                response = client.post(
+                    reverse("edupilot:attendanceupload"),
+                    class_day,
+                    content_type="application/json",
+                    HTTP_AUTHORIZATION=authorization
+                )
+                self.assertEqual(response.status_code, status)
+        self.assertEqual(response.json()["rows"], 6)
+        self.assertEqual(
+            Attendance.objects.filter(is_present=True).count(),
+            3
+        )
+
+    def test_api_is_off_without_a_token(self):
+        with mock.patch.object(settings, "ATTENDANCE_API_TOKEN", None):
+            response = self.client.post(
+                reverse("edupilot:attendanceupload"),
+                "{}",
+                content_type="application/json",
+                HTTP_AUTHORIZATION="Bearer None"
+            )
+        self.assertEqual(response.status_code, 401)
+
+
+class SoftDeleteTests(TestCase):
+    def test_active_manager_skips_deleted_rows(self):
+        school_class = create_class("6", students=3)
+        student = school_class.students.first()
+        student.is_deleted = True
+        student.save()
+        User.objects.filter(pk=student.user_id).update(is_deleted=True)
+        self.assertEqual(Student.active.count(), 2)
+        self.assertEqual(User.active.count(), 2)
+        # The default managers still see every row, deleted or not
+        self.assertEqual(Student.objects.count(), 3)
+        self.assertEqual(school_class.students.count(), 3)
+        self.assertEqual(
+            User.objects.get(email=student.user.email).pk,
+            student.user_id
+        )
+
+    def test_active_indexes_exist(self):
+        expected = {
+            User: "user_role_active_idx",
+            Administrator: "administrator_active_idx",
+            Parent: "parent_active_idx",
+            Subject: "subject_active_idx",
+            Teacher: "teacher_active_idx",
+            Student: "student_class_active_idx",
+            Attendance: "attendance_class_date_idx",
+        }
+        with connection.cursor() as cursor:
+            for model, index_name in expected.items():
+                constraints = connection.introspection.get_constraints(
+                    cursor,
+                    model._meta.db_table
+                )
+                self.assertTrue(constraints[index_name]["index"])
+
+    def test_index_benchmark_skips_other_databases(self):
+        stdout = io.StringIO()
+        with mock.patch.object(connection, "vendor", "sqlite"):
+            call_command("explain_soft_delete_indexes", stdout=stdout)
+        self.assertIn("needs PostgreSQL", stdout.getvalue())
+
+
+def create_exam(school_class, subject, exam_name="Term"):
+    return Exam.objects.create(
+        exam_name=exam_name,
+        class_level=school_class,
+        subject=subject,
+        question_paper=QuestionPaper.objects.create(
+            subject=subject,
+            class_level=school_class
+        )
+    )
+
+
+class MarksImportTests(TestCase):
+    def setUp(self):
+        self.school_class = create_class("8", students=4)
+        self.subject = Subject.objects.create(subject_name="Science")
+        self.exam = create_exam(self.school_class, self.subject)
+
+    def grades(self):
+        return dict(
+            StudentAssessment.active.filter(exam=self.exam).values_list(
+                "student__roll_number",
+                "grade"
+            )
+        )
+
+    def test_grades_follow_the_boundaries(self):
+        self.assertEqual(
+            list(grade_marks([100, 90, 89.9, 75, 60, 45, 33, 32.9, 0])),
+            ["A", "A", "B", "B", "C", "D", "E", "F", "F"]
+        )
+        self.assertEqual(
+            list(grade_marks(
+                [50, 40, 39.5, 25, 24],
+                max_marks=50,
+                boundaries={"A": 80, "B": 50}
+            )),
+            ["A", "A", "B", "B", "F"]
+        )
+
+    def test_unknown_grades_in_boundaries_are_rejected(self):
+        with self.assertRaisesMessage(ValueError, "A+, Z"):
+            check_grade_boundaries({"A": 90, "A+": 95, "Z": 10})
+        sheet = pd.DataFrame({"roll_number": ["1"], "marks_obtained": ["50"]})
+        with self.assertRaises(ValueError):
+            import_exam_marks(sheet, exam=self.exam, boundaries={"Z": 10})
+        with self.assertRaisesMessage(CommandError, "Z"):
+            call_command(
+                "import_exam_marks",
+                "marks.csv",
+                "--exam",
+                str(self.exam.id),
+                "--boundary",
+                "Z=10"
+            )
+        self.assertFalse(StudentAssessment.objects.exists())
+
+    def test_import_upserts_and_reports_bad_rows(self):
+        report = import_exam_marks(
+            pd.DataFrame({
+                "Roll_Number": ["1", "2", "3", "9", "x", "4", "4"],
+                "Marks_Obtained": ["95", "70", "20", "50", "50", "150", "abc"]
+            }),
+            exam=self.exam,
+            rank=False
+        )
+        self.assertEqual((report["created"], report["updated"]), (3, 0))
+        self.assertEqual(report["errors"], [
+            (5, "No student with this roll number"),
+            (6, "Roll number is not a number"),
+            (7, "Marks must be between 0 and 100"),
+            (8, "Marks are not a number"),
+        ])
+        self.assertEqual(self.grades(), {1: "A", 2: "C", 3: "F"})
+
+        report = import_exam_marks(
+            pd.DataFrame({
+                "exam_id": [str(self.exam.id)] * 2,
+                "roll_number": ["3", "4"],
+                "marks_obtained": ["40", "80"]
+            }),
+            max_marks=80,
+            rank=False
+        )
+        self.assertEqual((report["created"], report["updated"]), (1, 1))
+        self.assertEqual(self.grades(), {1: "A", 2: "C", 3: "D", 4: "A"})
+
+    def test_exam_id_column_conflicts_with_an_exam(self):
+        sheet = pd.DataFrame({
+            "exam_id": [str(self.exam.id)],
+            "roll_number": ["1"],
+            "marks_obtained": ["50"]
+        })
+        with self.assertRaisesMessage(ValueError, "exam_id column"):
+            import_exam_marks(sheet, exam=self.exam)
+        with self.assertRaisesMessage(ValueError, "exam_id"):
+            import_exam_marks(sheet.drop(columns="exam_id"))
+
+
+class RankingTests(TestCase):
+    def test_ranks_follow_exam_totals(self):
+        rng = random.Random(5)
+        classes = [create_class("7", division, 5) for division in "AB"]
+        unmarked = create_class("7", "C", 2)
+        subject = Subject.objects.create(subject_name="Mathematics")
+        totals = defaultdict(float)
+        for school_class in classes:
+            for exam_name in ("Unit test", "Term"):
+                exam = create_exam(school_class, subject, exam_name)
+                for student in school_class.students.all():
+                    marks = rng.choice([40, 55, 70, 85])
+                    StudentAssessment.objects.create(
+                        exam=exam,
+                        student=student,
+                        marks_obtained=marks
+                    )
+                    totals[student.id] += marks
+        # Deleted marks don't count
+        StudentAssessment.objects.create(
+            exam=create_exam(unmarked, subject),
+            student=unmarked.students.first(),
+            marks_obtained=100,
+            is_deleted=True
+        )
+
+        # Ranking one division still ranks its whole grade
+        results = {
+            row["student_id"]: row
+            for row in rank_students([classes[0].id])["results"]
+        }
+        self.assertEqual(len(results), len(totals))
+        for student in Student.objects.filter(class_enrolled__in=classes):
+            row = results[str(student.id)]
+            classmates = [
+                totals[other.id]
+                for other in Student.objects.filter(
+                    class_enrolled=student.class_enrolled
+                )
+            ]
+            class_rank = 1 + sum(
+                total > totals[student.id] for total in classmates
+            )
+            grade_rank = 1 + sum(
+                total > totals[student.id] for total in totals.values()
+            )
+            self.assertEqual(row["total"], totals[student.id])
+            self.assertEqual(row["class_rank"], class_rank)
+            self.assertEqual(row["grade_rank"], grade_rank)
+            self.assertEqual(
+                student.rank,
+                {1: Rank.FIRST, 2: Rank.SECOND, 3: Rank.THIRD}.get(class_rank)
+            )
+        self.assertFalse(unmarked.students.exclude(rank=None).exists())
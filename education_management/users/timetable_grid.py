@@ -0,0 +1,193 @@
+import csv
+import json
+import numpy as np
+
+
+# Interned strings for grid cells; id 0 is always the empty cell
+class Vocabulary:
+    def __init__(self):
+        self.names = [""]
+        self.ids = {"": 0}
+
+    def intern(self, name):
+        value_id = self.ids.get(name)
+        if value_id is None:
+            value_id = len(self.names)
+            self.names.append(name)
+            self.ids[name] = value_id
+        return value_id
+
+
+# Weekly schedule for many entities (classes or teachers) as one
+# (entity, day, period) int32 array of interned ids. Entities may use
+# fewer periods than the grid width; the rest of their row stays empty
+# and is left out of exports. Dicts, JSON and CSV are only built when
+# asked for, and skip entities with nothing scheduled unless export_empty
+# is set.
+class TimetableGrid:
+    def __init__(
+            self,
+            entities,
+            days,
+            num_periods,
+            vocabulary=None,
+            export_empty=True
+        ):
+        self.export_empty = export_empty
+        self.entities = list(entities)
+        self.entity_ids = {
+            entity: index for index, entity in enumerate(self.entities)
+        }
+        self.days = list(days)
+        self.day_ids = {day: index for index, day in enumerate(self.days)}
+        self.vocabulary = vocabulary or Vocabulary()
+        self.cells = np.zeros(
+            (len(self.entities), len(self.days), num_periods),
+            dtype=np.int32
+        )
+        self.period_counts = np.full(
+            len(self.entities),
+            num_periods,
+            dtype=np.int32
+        )
+        # Class grids only: the teacher-grid period (0-based) each lesson's
+        # teacher was booked in, -1 if the teacher got no period
+        self.teacher_periods = np.full(self.cells.shape, -1, dtype=np.int16)
+
+    def set_period_count(self, entity, num_periods):
+        self.period_counts[self.entity_ids[entity]] = num_periods
+
+    # Day x period view of one entity's ids, for in-place updates
+    def week(self, entity):
+        index = self.entity_ids[entity]
+        return self.cells[index, :, :self.period_counts[index]]
+
+    # Day x period view of one entity's teacher periods, like week()
+    def teacher_period_week(self, entity):
+        index = self.entity_ids[entity]
+        return self.teacher_periods[index, :, :self.period_counts[index]]
+
+    # Fill rows from a to_dict() export; entities and days not in the
+    # grid are skipped
+    def load_dict(self, timetables):
+        for entity, week in timetables.items():
+            if entity not in self.entity_ids:
+                continue
+            index = self.entity_ids[entity]
+            for day, periods in week.items():
+                if day not in self.day_ids:
+                    continue
+                self.cells[index, self.day_ids[day], :len(periods)] = [
+                    self.vocabulary.intern(value) for value in periods
+                ]
+
+    # Fill teacher periods from a teacher_periods_dict() export
+    def load_teacher_periods(self, teacher_periods):
+        for entity, week in teacher_periods.items():
+            if entity not in self.entity_ids:
+                continue
+            index = self.entity_ids[entity]
+            for day, periods in week.items():
+                if day not in self.day_ids:
+                    continue
+                row = self.teacher_periods[index, self.day_ids[day]]
+                row[:len(periods)] = [
+                    -1 if period is None else period for period in periods
+                ]
+
+    # Copy another grid's rows (e.g. one built in a worker process) into
+    # this one, re-mapping its value ids onto this grid's vocabulary
+    def merge(self, other):
+        mapping = np.asarray(
+            [self.vocabulary.intern(name) for name in other.vocabulary.names],
+            dtype=np.int32
+        )
+        indices = [self.entity_ids[entity] for entity in other.entities]
+        self.cells[indices] = mapping[other.cells]
+        self.teacher_periods[indices] = other.teacher_periods
+        self.period_counts[indices] = other.period_counts
+
+    # Entities with at least one filled period
+    def active_entities(self):
+        return [
+            self.entities[index]
+            for index in np.flatnonzero(self.cells.any(axis=(1, 2)))
+        ]
+
+    # (entity, day, period) of every cell holding the same value as
+    # another entity's cell at the same time, e.g. a class booked with two
+    # teachers at once in a teacher grid. Each time slot's ids are sorted
+    # once across entities, so a clash is two equal neighbours.
+    def clashes(self):
+        if not self.entities:
+            return []
+        num_periods = self.cells.shape[2]
+        flat = self.cells.transpose(1, 2, 0).reshape(-1, len(self.entities))
+        ordered = np.sort(flat, axis=1)
+        repeated = (ordered[:, 1:] == ordered[:, :-1]) & (ordered[:, 1:] != 0)
+        slots, columns = np.nonzero(repeated)
+        hits, entities = np.nonzero(
+            flat[slots] == ordered[slots, columns + 1][:, None]
+        )
+        found = np.unique(
+            np.stack([slots[hits], entities], axis=1),
+            axis=0
+        )
+        return [
+            (
+                self.entities[entity],
+                self.days[slot // num_periods],
+                int(slot % num_periods)
+            )
+            for slot, entity in found.tolist()
+        ]
+
+    def to_dict(self, entities=None):
+        if entities is None:
+            entities = (
+                self.entities
+                if self.export_empty
+                else self.active_entities()
+            )
+        names = np.asarray(self.vocabulary.names, dtype=object)
+        timetables = {}
+        for entity in entities:
+            week = names[self.week(entity)]
+            timetables[entity] = {
+                day: week[index].tolist()
+                for index, day in enumerate(self.days)
+            }
+        return timetables
+
+    # Teacher periods in to_dict() layout, None where no period was booked
+    def teacher_periods_dict(self, entities=None):
+        if entities is None:
+            entities = self.entities
+        return {
+            entity: {
+                day: [
+                    None if period < 0 else period
+                    for period in week[index].tolist()
+                ]
+                for index, day in enumerate(self.days)
+            }
+            for entity in entities
+            for week in [self.teacher_period_week(entity)]
+        }
+
+    def to_json(self, entities=None, **kwargs):
+        return json.dumps(self.to_dict(entities), **kwargs)
+
+    # Long format: one row per filled or empty period of each entity
+    def to_csv(
+            self,
+            file,
+            entities=None,
+            header=("Entity", "Day", "Period", "Value")
+        ):
+        writer = csv.writer(file)
+        writer.writerow(header)
+        for entity, week in self.to_dict(entities).items():
+            for day, periods in week.items():
+                for period, value in enumerate(periods, start=1):
+                    writer.writerow([entity, day, period, value])
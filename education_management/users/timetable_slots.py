@@ -0,0 +1,100 @@
+import csv
+import os
+import uuid
+from datetime import datetime
+import numpy as np
+from django.db import transaction
+from education_management import settings
+from users.models import TimetableSlot
+
+
+# Replace a school timetable's slots with the filled cells of a class
+# grid, in bulk_create batches, and write the same rows to
+# generated_timetable_csv (Class, Day, Period, Subject, Teacher, Teacher
+# Period). Each lesson records the period its teacher was actually booked
+# for in the teacher grid (the class grid's teacher_periods, set by the
+# booking), which the next-free-period booking may have moved; teacher
+# lookups use that period, so they match the teacher grid. A lesson whose
+# teacher got no period keeps the teacher with no teacher period. The teacher grid is exported next to it as teacher_timetable_*.csv
+# (Teacher, Day, Period, Class). Returns the slot count and both paths.
+def save_timetable_slots(
+        school_timetable,
+        class_timetables,
+        teacher_schedules,
+        roster
+    ):
+    subject_names = class_timetables.vocabulary.names
+    slots = []
+    for entity, day, period in zip(*np.nonzero(class_timetables.cells)):
+        class_name = class_timetables.entities[entity]
+        subject = subject_names[class_timetables.cells[entity, day, period]]
+        teacher = roster["class_subjects"].get(class_name, {}).get(subject, "")
+        teacher_period = class_timetables.teacher_periods[entity, day, period]
+        slots.append(TimetableSlot(
+            school_timetable=school_timetable,
+            class_name=class_name,
+            day=class_timetables.days[day],
+            period=int(period) + 1,
+            subject=subject,
+            teacher=teacher,
+            teacher_period=(
+                int(teacher_period) + 1
+                if teacher and teacher_period >= 0
+                else None
+            )
+        ))
+
+    output_dir = os.path.join(settings.MEDIA_ROOT, 'class_timetables')
+    os.makedirs(output_dir, exist_ok=True)
+    suffix = (
+        f"{datetime.now().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}"
+    )
+    file_name = f'class_timetable_{suffix}.csv'
+    teacher_file_name = f'teacher_timetable_{suffix}.csv'
+    with open(
+        os.path.join(output_dir, teacher_file_name),
+        "w",
+        newline=""
+    ) as file:
+        teacher_schedules.to_csv(
+            file,
+            header=("Teacher", "Day", "Period", "Class")
+        )
+    with open(os.path.join(output_dir, file_name), "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow([
+            "Class",
+            "Day",
+            "Period",
+            "Subject",
+            "Teacher",
+            "Teacher Period"
+        ])
+        writer.writerows(
+            [
+                slot.class_name,
+                slot.day,
+                slot.period,
+                slot.subject,
+                slot.teacher,
+                slot.teacher_period or ""
+            ]
+            for slot in slots
+        )
+
+    with transaction.atomic():
+        school_timetable.slots.all().delete()
+        TimetableSlot.objects.bulk_create(
+            slots,
+            batch_size=settings.TIMETABLE_SLOT_BATCH_SIZE
+        )
+        school_timetable.generated_timetable_csv = (
+            f"class_timetables/{file_name}"
+        )
+        school_timetable.save(update_fields=["generated_timetable_csv"])
+    return {
+        "slots": len(slots),
+        "generated_csv_path": f"class_timetables/{file_name}",
+        "teacher_csv_path": f"class_timetables/{teacher_file_name}"
+    }
+
@@ -0,0 +1,198 @@
+import time
+import numpy as np
+
+
+SPORTS = "Sports"
+
+
+# Cells the default path places on purpose and the solver keeps: the
+# class teacher's subject in the first period, and Sports in the last
+# three periods (see schedule_class_week and adjust_saturday)
+def _is_pinned(subject, period, num_periods, main_subject):
+    if period == 0:
+        return subject == main_subject
+    return subject == SPORTS and period >= max(num_periods - 3, 1)
+
+
+# Conflict-free alternative to booking teachers into their "next free
+# period". Lessons stay on their day but may move between periods, and
+# the class grid is rewritten to match, so class and teacher timetables
+# always agree and no teacher has two classes at once. Pinned cells
+# (_is_pinned) stay where they are unless their teacher is already
+# booked by another pinned cell at that time; Sports then takes another
+# of the last periods if it can.
+#
+# Each (day, period) is a bipartite matching between the classes that
+# still have lessons that day and those lessons' teachers, grown with
+# augmenting paths (Kuhn). Classes with the least slack (free periods
+# left minus lessons left) are matched first, and each class tries the
+# lesson originally in this period before the others, so a clash-free
+# input comes out unchanged. Lessons still pending when a class runs
+# out of periods go to the first slot on any day where the class and
+# the teacher are both free. Those with no such slot are left out of
+# both grids and listed in the metrics as dropped_lessons.
+def solve_teacher_periods(teacher_schedules, class_timetables, classes, roster):
+    started = time.perf_counter()
+    subject_names = class_timetables.vocabulary.names
+    class_ids = teacher_schedules.vocabulary
+    main_subjects = roster.get("main_subjects", {})
+    period_counts = {
+        cls: int(class_timetables.period_counts[class_timetables.entity_ids[cls]])
+        for cls in classes
+    }
+    moved = 0
+    leftovers = []
+    dropped = []
+
+    def book(cls, teacher, day_index, period, subject_id):
+        class_timetables.week(cls)[day_index, period] = subject_id
+        class_timetables.teacher_period_week(cls)[day_index, period] = (
+            period if teacher else -1
+        )
+        if teacher:
+            teacher_schedules.week(teacher)[day_index, period] = (
+                class_ids.intern(cls)
+            )
+
+    for day_index in range(len(class_timetables.days)):
+        # (subject id, teacher, original period) still to place, per class
+        pending = {}
+        # Periods of each class still open, and teachers taken by pinned
+        # cells, per period
+        open_periods = {}
+        pinned_teachers = [set() for _ in range(class_timetables.cells.shape[2])]
+        for cls in classes:
+            day_periods = class_timetables.week(cls)[day_index]
+            class_subjects = roster["class_subjects"].get(cls, {})
+            lessons = [
+                (
+                    subject_id,
+                    class_subjects.get(subject_names[subject_id]),
+                    period
+                )
+                for period, subject_id in enumerate(day_periods)
+                if subject_id
+            ]
+            day_periods[:] = 0
+            class_timetables.teacher_period_week(cls)[day_index] = -1
+            pending[cls] = []
+            open_periods[cls] = np.ones(period_counts[cls], dtype=bool)
+            for subject_id, teacher, period in lessons:
+                subject = subject_names[subject_id]
+                num_periods = period_counts[cls]
+                if not _is_pinned(
+                    subject,
+                    period,
+                    num_periods,
+                    main_subjects.get(cls)
+                ):
+                    pending[cls].append((subject_id, teacher, period))
+                    continue
+                # Two pinned cells need the same teacher: Sports may take
+                # another of the last periods, anything else is matched
+                # like an ordinary lesson
+                candidates = [period]
+                if subject == SPORTS:
+                    candidates += range(max(num_periods - 3, 1), num_periods)
+                for candidate in candidates:
+                    if (
+                        open_periods[cls][candidate]
+                        and teacher not in pinned_teachers[candidate]
+                    ):
+                        book(cls, teacher, day_index, candidate, subject_id)
+                        open_periods[cls][candidate] = False
+                        if teacher:
+                            pinned_teachers[candidate].add(teacher)
+                        moved += candidate != period
+                        break
+                else:
+                    pending[cls].append((subject_id, teacher, period))
+
+        for period in range(class_timetables.cells.shape[2]):
+            open_classes = sorted(
+                (
+                    cls
+                    for cls in classes
+                    if pending[cls]
+                    and period < period_counts[cls]
+                    and open_periods[cls][period]
+                ),
+                key=lambda cls: (
+                    open_periods[cls][period:].sum() - len(pending[cls])
+                )
+            )
+            booked = {}  # Teacher -> class
+            chosen = {}  # Class -> index into its pending lessons
+            for cls in open_classes:
+                _augment(
+                    cls,
+                    period,
+                    pending,
+                    booked,
+                    chosen,
+                    set(pinned_teachers[period])
+                )
+
+            for cls, index in chosen.items():
+                subject_id, teacher, original_period = pending[cls].pop(index)
+                book(cls, teacher, day_index, period, subject_id)
+                moved += original_period != period
+
+        leftovers.extend(
+            (cls, day_index, lesson)
+            for cls, lessons in pending.items()
+            for lesson in lessons
+        )
+
+    # Second chance on another day: any slot where both the class and
+    # the teacher are free
+    for cls, original_day, (subject_id, teacher, period) in leftovers:
+        free = class_timetables.week(cls) == 0
+        if teacher:
+            free &= teacher_schedules.week(teacher)[:, :free.shape[1]] == 0
+        slots = np.argwhere(free)
+        if not slots.size:
+            dropped.append({
+                "class": cls,
+                "day": class_timetables.days[original_day],
+                "period": int(period),
+                "subject": subject_names[subject_id],
+                "teacher": teacher
+            })
+            continue
+        day_index, free_period = slots[0]
+        book(cls, teacher, day_index, free_period, subject_id)
+        moved += 1
+
+    return {
+        "solver": "matching",
+        "solve_seconds": round(time.perf_counter() - started, 4),
+        "unresolved_conflicts": len(dropped),
+        "moved_lessons": moved,
+        "dropped_lessons": dropped
+    }
+
+
+# Find a lesson for `cls` this period, re-routing classes already
+# matched to a teacher it needs when they have another option
+def _augment(cls, period, pending, booked, chosen, visited):
+    lessons = pending[cls]
+    order = sorted(
+        range(len(lessons)),
+        key=lambda i: (lessons[i][2] != period, lessons[i][2])
+    )
+    for index in order:
+        teacher = lessons[index][1]
+        if not teacher:
+            chosen[cls] = index
+            return True
+        if teacher in visited:
+            continue
+        visited.add(teacher)
+        if teacher not in booked or _augment(
+            booked[teacher], period, pending, booked, chosen, visited
+        ):
+            booked[teacher] = cls
+            chosen[cls] = index
+            return True
+    return False
@@ -0,0 +1,105 @@
+import os
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+
+EXAM_TIMETABLE_COLUMNS = ["Date", "Class", "Subject", "Session"]
+
+
+# Read-only columnar copy of a generated exam timetable. Every column is
+# kept as small integer codes into its distinct values, so filtering by
+# class, date or subject is a vectorised comparison and a page only
+# materialises the rows it shows. The columns are saved next to the CSV
+# as .npz so later page views skip parsing the CSV.
+class ExamTimetableColumns:
+    def __init__(self, codes, categories):
+        self.codes = codes
+        self.categories = categories
+
+    def __len__(self):
+        return len(self.codes["Date"])
+
+    @classmethod
+    def from_csv(cls, csv_path):
+        df = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+        codes = {}
+        categories = {}
+        for column in EXAM_TIMETABLE_COLUMNS:
+            values = df[column]
+            if column == "Date":
+                order = pd.to_datetime(values, format="%d-%b-%Y")
+                distinct = values.iloc[np.argsort(order.to_numpy())].unique()
+            elif column == "Class":
+                distinct = sorted(values.unique(), key=_class_sort_key)
+            else:
+                distinct = sorted(values.unique())
+            column_data = pd.Categorical(values, categories=distinct)
+            codes[column] = column_data.codes.astype(np.int32)
+            categories[column] = np.asarray(distinct, dtype=str)
+        return cls(codes, categories)
+
+    @classmethod
+    def load(cls, npz_path):
+        with np.load(npz_path) as data:
+            codes = {c: data[f"{c}_codes"] for c in EXAM_TIMETABLE_COLUMNS}
+            categories = {
+                c: data[f"{c}_categories"] for c in EXAM_TIMETABLE_COLUMNS
+            }
+        return cls(codes, categories)
+
+    def save(self, npz_path):
+        arrays = {}
+        for column in EXAM_TIMETABLE_COLUMNS:
+            arrays[f"{column}_codes"] = self.codes[column]
+            arrays[f"{column}_categories"] = self.categories[column]
+        with open(npz_path, "wb") as f:
+            np.savez(f, **arrays)
+
+    def choices(self, column):
+        return self.categories[column].tolist()
+
+    # Row numbers matching every given {column: value}, in file order
+    def filter(self, criteria):
+        mask = np.ones(len(self), dtype=bool)
+        for column, value in criteria.items():
+            matches = np.flatnonzero(self.categories[column] == value)
+            if not matches.size:
+                return np.array([], dtype=np.int64)
+            mask &= self.codes[column] == matches[0]
+        return np.flatnonzero(mask)
+
+    def rows(self, indices):
+        indices = np.asarray(indices, dtype=np.int64)
+        columns = {
+            column: self.categories[column][self.codes[column][indices]]
+            for column in EXAM_TIMETABLE_COLUMNS
+        }
+        return [
+            dict(zip(EXAM_TIMETABLE_COLUMNS, values))
+            for values in zip(
+                *(columns[c].tolist() for c in EXAM_TIMETABLE_COLUMNS)
+            )
+        ]
+
+
+def _class_sort_key(class_name):
+    if class_name.isdigit():
+        return (0, int(class_name), "")
+    return (1, 0, class_name)
+
+
+@lru_cache(maxsize=16)
+def _load_exam_timetable_columns(csv_path, mtime):
+    npz_path = f"{csv_path}.npz"
+    if os.path.exists(npz_path) and os.path.getmtime(npz_path) >= mtime:
+        return ExamTimetableColumns.load(npz_path)
+    columns = ExamTimetableColumns.from_csv(csv_path)
+    columns.save(npz_path)
+    return columns
+
+
+# Columnar timetable for a generated CSV, cached in memory until the
+# file changes
+def get_exam_timetable_columns(csv_path):
+    return _load_exam_timetable_columns(csv_path, os.path.getmtime(csv_path))
@@ -4,7 +4,11 @@ from users.views import (
     TimeTableAgent,
     ExamTimeTableView,
     ClassTimeTable,
-    EduHelper
+    EduHelper,
+    TimetableJobStatus,
+    TimetableSlots,
+    AttendanceUpload,
+    AttendanceSummary
 )
 
 app_name = "edupilot"
@@ -14,5 +18,21 @@ urlpatterns = [
     path('timetable/', TimeTableAgent, name="timetable"),
     path('exam-timetable/', ExamTimeTableView, name="examtimetable"),
     path('class-timetable/', ClassTimeTable, name="classtimetable"),
-    path('eduhelper/', EduHelper, name="eduhelper")
+    path('eduhelper/', EduHelper, name="eduhelper"),
+    path(
+        'timetable-jobs/<uuid:job_id>/',
+        TimetableJobStatus,
+        name="timetablejobstatus"
+    ),
+    path(
+        'timetable-slots/<uuid:school_timetable_id>/',
+        TimetableSlots,
+        name="timetableslots"
+    ),
+    path('attendance/bulk/', AttendanceUpload, name="attendanceupload"),
+    path(
+        'attendance/summary/',
+        AttendanceSummary,
+        name="attendancesummary"
+    )
 ]
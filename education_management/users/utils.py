@@ -1,12 +1,38 @@
+import numpy as np
 import pandas as pd
 import random
-from datetime import datetime, timedelta
+from datetime import datetime
 from collections import defaultdict
 import os
-import traceback
+import time
 import csv
-import json
+import heapq
+import multiprocessing
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from education_management import settings
+from users.exam_packing import ExamPacker
+from users.exam_scheduler import ExamScheduler, exam_date_slots
+from users.roster_cache import (
+    load_teacher_roster,
+    save_teacher_roster,
+    teacher_roster_cache_key
+)
+from users.school_config import get_school_config
+from users.timetable_grid import TimetableGrid
+from users.timetable_solver import solve_teacher_periods
+
+
+# Process pool for CPU-bound generation. Workers are spawned rather than
+# forked: callers include the background job threads, and forking a
+# threaded process that holds a database connection copies both into
+# the child. Workers only need pure-Python modules, never the ORM.
+def process_pool(max_workers):
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context("spawn")
+    )
 
 
 subject_categories = {
@@ -25,6 +51,16 @@ subject_categories = {
 }
 
 
+# Approximate periods per section per week of each subject category,
+# following the Step 2 rules: a main subject up to daily, languages five
+# times and other subjects twice a week
+weekly_periods_by_category = {
+    "main": 6,
+    "language": 5,
+    "other": 2,
+}
+
+
 # Define subjects for each grade
 subjects_per_grade = {
     "1": ["Mathematics", "English", "Hindi", "Arts"],
@@ -40,107 +76,142 @@ subjects_per_grade = {
 }
 
 
-def generate_exam_timetable(csv_file, start_date, end_date):
-    try:
-        df = pd.read_csv(csv_file)  # Load subjects CSV
-        start_date = datetime.strptime(start_date, "%Y-%m-%d")
-        end_date = datetime.strptime(end_date, "%Y-%m-%d")
-
-        total_days = (end_date - start_date).days + 1
-        date_slots = [
-            start_date + timedelta(days=i)
-            for i in range(total_days)
-        ]
-
-        # Identify Sundays
-        sundays = [date for date in date_slots if date.weekday() == 6]
-        # Sunday = 6
-
-        # Remove Sundays from available slots
-        available_dates = [date for date in date_slots if date not in sundays]
-
-        timetable = []
-        subject_schedule = defaultdict(list)
-        # Track when each subject is scheduled
-
-        for index, row in df.iterrows():
-            class_name = int(row.iloc[0])
-            # First column is class (convert to int)
-            subjects = row.iloc[1:].dropna().tolist()  # Remove NaN values
-            num_subjects = len(subjects)
-
-            exam_dates = []
-            temp_dates = available_dates[:]  # Copy available dates
+# Subject types used by the class timetable generator
+main_subjects = {'Mathematics', 'Science', 'Social Science', 'Environment Studies'}
+languages = {'English', 'Hindi', 'Sanskrit/French'}
+secondary_subjects = {'Arts', 'Health and Physical Education', 'Music', 'Sports', 'Computer Application', 'General Knowledge'}
+
+
+def schedule_exam_rows(scheduler, df, rng):
+    for row in df.to_numpy(dtype=object):
+        class_name = int(row[0])
+        # First column is class (convert to int)
+        subjects = [s for s in row[1:] if pd.notna(s)]
+        # Remove NaN values
+        scheduler.schedule_class(class_name, subjects)
+
+    timetable_df = scheduler.flush()
+    # One draw for the whole chunk; rng.random() consumes the stream one
+    # value per exam, so a seed gives the same sessions at any chunk size
+    timetable_df["Session"] = np.where(
+        rng.random(len(timetable_df)) < 0.5,
+        "Morning",
+        "Afternoon"
+    )
+    return timetable_df
+
+
+# Generate one exam timetable into MEDIA_ROOT/exam_timetables and return
+# its media path. Unreadable dates or CSVs and ExamScheduleError are
+# raised to the caller, which reports them.
+def generate_exam_timetable(
+        csv_file,
+        start_date,
+        end_date,
+        chunksize=None,
+        seed=None,
+        blackout_dates=(),
+        packed=False,
+        max_exams_per_day=None,
+        min_gap_days=0
+    ):
+    start_date = datetime.strptime(start_date, "%Y-%m-%d")
+    end_date = datetime.strptime(end_date, "%Y-%m-%d")
+    date_slots = exam_date_slots(start_date, end_date, blackout_dates)
+    rng = np.random.default_rng(seed)
+
+    output_dir = os.path.join(settings.MEDIA_ROOT, 'exam_timetables')
+    os.makedirs(output_dir, exist_ok=True)
+    current_time = datetime.now().strftime("%Y%m%d%H%M%S")
+    file_name = f'exam_timetable_{current_time}_{uuid.uuid4().hex[:8]}.csv'
+    output_path = os.path.join(output_dir, file_name)
+    generated_csv_path = f"exam_timetables/{file_name}"
 
-            # Calculate gaps dynamically
-            remaining_days = len(temp_dates)
-            if remaining_days > num_subjects:
-                gap_days = (
-                    remaining_days - num_subjects
-                ) // num_subjects  # Even gaps
-            else:
-                gap_days = 0  # No extra gaps possible
-
-            for subject in subjects:
-                if exam_dates:
-                    # Ensure proper gaps based on calculated gap days
-                    if class_name <= 3 or gap_days > 0:
-                        for _ in range(min(gap_days, len(temp_dates))):
-                            temp_dates.pop(0)  # Add a gap by skipping days
-
-                    # Avoid subject clashes for higher classes (7-10)
-                    for i, exam_date in enumerate(temp_dates):
-                        if subject not in subject_schedule[
-                            exam_date.strftime("%d-%b-%Y")
-                        ]:
-                            break
-                    else:
-                        i = 0  # Fallback if no non-clashing date found
-                    temp_dates = temp_dates[i:]  # Assign only from valid dates
-
-                if temp_dates:
-                    exam_date = temp_dates.pop(0)  # Assign next available date
-                    session = random.choice(["Morning", "Afternoon"])
-                    # Random session
-                    exam_dates.append((exam_date, subject, session))
-                    subject_schedule[
-                        exam_date.strftime("%d-%b-%Y")
-                    ].append(subject)  # Mark subject as scheduled
-
-            # Add to timetable
-            for exam_date, subject, session in exam_dates:
-                timetable.append(
-                    [
-                        exam_date.strftime("%d-%b-%Y"),
-                        class_name,
-                        subject,
-                        session
-                    ]
+    try:
+        if packed:
+            # Packed mode needs every class up front, so it ignores chunksize
+            packer = ExamPacker(
+                date_slots,
+                max_exams_per_day=max_exams_per_day,
+                min_gap_days=min_gap_days
+            )
+            df = pd.read_csv(csv_file)  # Load subjects CSV
+            for row in df.to_numpy(dtype=object):
+                packer.add_class(
+                    int(row[0]),
+                    [s for s in row[1:] if pd.notna(s)]
                 )
-
-        # Convert to DataFrame and save
-        timetable_df = pd.DataFrame(
-            timetable, columns=["Date", "Class", "Subject", "Session"]
-        )
-        output_dir = os.path.join('static', 'exam_timetables')
-        os.makedirs(output_dir, exist_ok=True)
-        current_time = datetime.now().strftime("%Y%m%d%H%M%S")
-        output_path = os.path.join(
-            settings.MEDIA_ROOT,
-            'exam_timetables',
-            f'exam_timetable_{current_time}.csv'
-        )
-        generated_csv_path = f"exam_timetables/exam_timetable_{current_time}.csv"
-        timetable_df.to_csv(output_path, index=False)
-        return generated_csv_path
+            packer.solve().to_csv(output_path, index=False)
+        elif chunksize:
+            # Streaming mode: read the classes a chunk at a time and append
+            # each chunk's exams to the output, so memory is bounded by the
+            # chunk size rather than by the number of classes
+            scheduler = ExamScheduler(date_slots)
+            with open(output_path, 'w', newline='') as output:
+                csv.writer(output).writerow(
+                    ["Date", "Class", "Subject", "Session"]
+                )
+                for chunk in pd.read_csv(csv_file, chunksize=chunksize):
+                    timetable_df = schedule_exam_rows(scheduler, chunk, rng)
+                    timetable_df.to_csv(output, header=False, index=False)
+        else:
+            scheduler = ExamScheduler(date_slots)
+            df = pd.read_csv(csv_file)  # Load subjects CSV
+            timetable_df = schedule_exam_rows(scheduler, df, rng)
+            timetable_df.to_csv(output_path, index=False)
     except Exception:
-        traceback.print_exc()
+        # Don't leave a half-written timetable behind
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        raise
+    return generated_csv_path
+
+
+# Generate many exam timetables with the same seed. Each job is a
+# (csv_file, start_date, end_date) tuple; identical jobs are generated
+# once and share the resulting file. Other keyword arguments are passed
+# on to generate_exam_timetable.
+def generate_exam_timetables(jobs, seed=None, **options):
+    generated = {}
+    results = []
+    for csv_file, start_date, end_date in jobs:
+        key = (csv_file, start_date, end_date)
+        if key not in generated:
+            generated[key] = generate_exam_timetable(
+                csv_file,
+                start_date,
+                end_date,
+                seed=seed,
+                **options
+            )
+        results.append(generated[key])
+    return results
+
+
+# Process pool worker for the generate_exam_timetables command.
+# Takes (csv_path, start_date, end_date, options) and returns the
+# generated path, the time it took and why no timetable was made: broken
+# constraints (ExamScheduleError), a bad date or an unreadable CSV.
+def timed_exam_timetable_job(job):
+    csv_path, start_date, end_date, options = job
+    started = time.perf_counter()
+    error_message = ""
+    try:
+        generated_csv_path = generate_exam_timetable(
+            csv_path,
+            start_date,
+            end_date,
+            **options
+        )
+    except (ValueError, OSError) as e:
+        # ExamScheduleError and pandas' parse errors are ValueErrors
+        generated_csv_path = None
+        error_message = f"{type(e).__name__}: {e}"
+    return generated_csv_path, time.perf_counter() - started, error_message
 
 
-# Read teacher data from CSV
+# Read teacher data from CSV, one teacher per row as it is parsed
 def read_teachers_from_csv(csv_filepath):
-    teachers = []
-
     with open(csv_filepath, "r", encoding="utf-8") as file:
         reader = csv.DictReader(file)
 
@@ -173,21 +244,7 @@ def read_teachers_from_csv(csv_filepath):
                 "level": level,
                 "class_subjects": class_subjects
             }
-            teachers.append(teacher)
-
-    return teachers
-
-
-# Function to generate class sections
-def generate_classes():
-    return [
-        f"{grade}{section}" for grade in range(1, 11) for section in [
-            'A',
-            'B',
-            'C',
-            'D'
-        ]
-    ]
+            yield teacher
 
 
 # Group subjects by grade level
@@ -205,69 +262,150 @@ def group_subjects_by_grade(classes):
     return subjects_by_grade
 
 
-# Assign class teachers from the imported teacher list
-def assign_class_teachers(teachers):
-    class_teachers = {}
-    assigned_teachers = set()
-
-    for class_code in generate_classes():
-        grade = class_code[:-1]  # Extract grade number (e.g., "1A" -> "1")
-
-        # Find teachers handling this grade (not section-based)
-        eligible_teachers = [
-            teacher
-            for teacher in teachers
-            if any(cls == grade for cls, subj in teacher["class_subjects"])
+# Assign class teachers from the imported teacher list. A previous
+# {class: teacher name} assignment is kept wherever that teacher still
+# teaches the grade, so an edited CSV does not reshuffle every class.
+# Teachers are indexed by grade once; each grade's pool of unassigned
+# teachers shrinks by swap-removal as names are taken, so the cost is
+# linear in sections + teachers. Pass a seed for a repeatable choice.
+def assign_class_teachers(
+        teachers,
+        previous_class_teachers=None,
+        config=None,
+        seed=None
+    ):
+    config = config or get_school_config()
+    rng = random.Random(seed) if seed is not None else random
+    teachers = list(teachers)
+    previous_class_teachers = previous_class_teachers or {}
+
+    # Grade -> indices of teachers handling it (not section-based)
+    pools = defaultdict(list)
+    pool_position = {}  # (grade, teacher index) -> position in the pool
+    grades_of = []
+    indices_by_name = defaultdict(list)
+    for index, teacher in enumerate(teachers):
+        grades = list(dict.fromkeys(cls for cls, _ in teacher["class_subjects"]))
+        for grade in grades:
+            pool_position[(grade, index)] = len(pools[grade])
+            pools[grade].append(index)
+        grades_of.append(grades)
+        indices_by_name[teacher["name"]].append(index)
+
+    # A teacher is class teacher of one section only: drop every row with
+    # their name from every pool
+    def take(name):
+        for index in indices_by_name[name]:
+            for grade in grades_of[index]:
+                pool = pools[grade]
+                position = pool_position.pop((grade, index))
+                last = pool.pop()
+                if last != index:
+                    pool[position] = last
+                    pool_position[(grade, last)] = position
+
+    for class_code in config.classes:
+        grade = str(config.grade_of[class_code])  # "1A" -> "1"
+        available = pools.get(grade)
+        if not available:
+            continue
+
+        previous_teacher = [
+            index
+            for index in indices_by_name.get(
+                previous_class_teachers.get(class_code),
+                []
+            )
+            if (grade, index) in pool_position
         ]
-
-        if eligible_teachers:
+        if previous_teacher:
+            class_teacher = teachers[previous_teacher[0]]
+        else:
             # Randomly select a class teacher (if not already assigned)
-            available_teachers = [
-                t
-                for t in eligible_teachers
-                if t["name"] not in assigned_teachers
-            ]
-            if available_teachers:
-                class_teacher = random.choice(available_teachers)
-                class_teacher["role"] = f"class teacher of {class_code}"
-                assigned_teachers.add(class_teacher["name"])
-                class_teachers[class_code] = class_teacher["name"]
+            class_teacher = teachers[rng.choice(available)]
+        class_teacher["role"] = f"class teacher of {class_code}"
+        take(class_teacher["name"])
     return teachers
 
 
-# Function to balance the teaching load
-def redistribute_teaching_load(teachers):
-    teacher_section_count = {
-        teacher["name"]: len(teacher["class_subjects"])
-        for teacher in teachers
-    }
-
-    underloaded_teachers = {
-        t["name"]: t
-        for t in teachers
-        if teacher_section_count[t["name"]] <= 3
-    }
-    overloaded_teachers = {
-        t["name"]: t
-        for t in teachers
-        if teacher_section_count[t["name"]] > 5
-    }
-
-    for overloaded_name, overloaded_teacher in overloaded_teachers.items():
-        extra_assignments = overloaded_teacher["class_subjects"][5:]
-        overloaded_teacher["class_subjects"] = overloaded_teacher[
-            "class_subjects"
-        ][:5]
-
-        for underloaded_name, underloaded_teacher in underloaded_teachers.items():
-            if len(underloaded_teacher["class_subjects"]) < 3:
-                underloaded_teacher[
-                    "class_subjects"
-                ].extend(extra_assignments[:3])
-                extra_assignments = extra_assignments[3:]
+# Balance section-level assignments by weekly periods. The most loaded
+# teacher (a max-heap) hands one assignment to the least loaded teacher
+# qualified for it, i.e. teaching that subject at the same level (a
+# min-heap per subject and level), whenever that narrows the gap between
+# them. This repeats until the busiest teacher is within max_spread
+# periods of the least busy, or has nothing left to hand over. A
+# teacher's first assignment, which decides a class teacher's subject,
+# never moves.
+def redistribute_teaching_load(teachers, max_spread=None):
+    teachers = list(teachers)
+    if max_spread is None:
+        max_spread = max(weekly_periods_by_category.values())
+
+    def weight(subject):
+        return weekly_periods_by_category[
+            subject_categories.get(subject, "other")
+        ]
 
-            if not extra_assignments:
+    load = [
+        sum(weight(subject) for _, subject in teacher["class_subjects"])
+        for teacher in teachers
+    ]
+    qualifications = [
+        {(subject, teacher["level"]) for _, subject in teacher["class_subjects"]}
+        for teacher in teachers
+    ]
+    qualified = defaultdict(list)  # (subject, level) -> [(load, teacher)]
+    for index, keys in enumerate(qualifications):
+        for key in keys:
+            qualified[key].append((load[index], index))
+    for heap in qualified.values():
+        heapq.heapify(heap)
+    busiest = [(-teacher_load, index) for index, teacher_load in enumerate(load)]
+    lightest = [(teacher_load, index) for index, teacher_load in enumerate(load)]
+    heapq.heapify(busiest)
+    heapq.heapify(lightest)
+
+    # Heaps keep stale (load, teacher) entries; drop them when they surface
+    def top(heap, sign=1):
+        while heap and sign * heap[0][0] != load[heap[0][1]]:
+            heapq.heappop(heap)
+        return heap[0][1] if heap else None
+
+    def least_loaded(key, exclude):
+        heap = qualified[key]
+        index = top(heap)
+        if index != exclude:
+            return index
+        entry = heapq.heappop(heap)
+        index = top(heap)
+        heapq.heappush(heap, entry)
+        return index
+
+    def push(index):
+        heapq.heappush(busiest, (-load[index], index))
+        heapq.heappush(lightest, (load[index], index))
+        for key in qualifications[index]:
+            heapq.heappush(qualified[key], (load[index], index))
+
+    while top(busiest, -1) is not None:
+        index = heapq.heappop(busiest)[1]
+        if load[index] - load[top(lightest)] <= max_spread:
+            break
+        assignments = teachers[index]["class_subjects"]
+        level = teachers[index]["level"]
+        for position in range(len(assignments) - 1, 0, -1):
+            subject = assignments[position][1]
+            receiver = least_loaded((subject, level), index)
+            if receiver is not None and load[index] - load[receiver] > weight(subject):
+                teachers[receiver]["class_subjects"].append(
+                    assignments.pop(position)
+                )
+                load[index] -= weight(subject)
+                load[receiver] += weight(subject)
+                push(index)
+                push(receiver)
                 break
+        # Teachers that could not hand anything over stay off the heap
 
     return teachers
 
@@ -299,39 +437,48 @@ def merge_other_subject_teachers(teachers):
     return list(merged_teachers.values())
 
 
-# Assign extra subject to teachers with minimum load
+# Assign extra subject to teachers with minimum load, two sections of
+# the given grades per teacher
 def assign_extra_subject_to_min_teachers(
         teachers,
-        subject_name="General Knowledge"
+        subject_name="General Knowledge",
+        grades=(9, 10),
+        config=None
     ):
+    config = config or get_school_config()
     main_teachers = [t for t in teachers if t["level"] == "higher"]
 
     main_teachers.sort(key=lambda t: len(t["class_subjects"]))
 
-    selected_teachers = main_teachers[:4]
-
     extra_subject_assignments = [
-        [["9A", subject_name], ["9B", subject_name]],
-        [["9C", subject_name], ["9D", subject_name]],
-        [["10A", subject_name], ["10B", subject_name]],
-        [["10C", subject_name], ["10D", subject_name]]
+        [[cls, subject_name] for cls in classes[i:i + 2]]
+        for grade in grades
+        for classes in [config.classes_by_grade.get(grade, [])]
+        for i in range(0, len(classes), 2)
     ]
 
+    selected_teachers = main_teachers[:len(extra_subject_assignments)]
+
     for teacher, extra_classes in zip(selected_teachers, extra_subject_assignments):
         teacher["class_subjects"].extend(extra_classes)
 
     return teachers
 
 
-def expand_class_subjects(teachers, sections=4):
-    expanded_teachers = []
+# One section-level teacher per teacher, yielded as each is expanded.
+# Grade-level entries ("9") become one entry per section; entries that
+# already name a section ("9A", e.g. the extra subject) are kept as is.
+def expand_class_subjects(teachers, config=None):
+    config = config or get_school_config()
 
     for teacher in teachers:
         expanded_class_subjects = []
 
         for cls, subject in teacher["class_subjects"]:
-            for section in range(sections):
-                section_label = chr(65 + section)  # 'A', 'B', 'C', 'D', etc.
+            if not cls.isdigit():
+                expanded_class_subjects.append([cls, subject])
+                continue
+            for section_label in config.section_labels.get(int(cls), []):
                 expanded_class_subjects.append(
                     [
                         f"{cls}{section_label}",
@@ -339,29 +486,96 @@ def expand_class_subjects(teachers, sections=4):
                     ]
                 )
 
-        expanded_teachers.append({
+        yield {
             "name": teacher["name"],
             "role": teacher["role"],
             "level": teacher["level"],
             "class_subjects": expanded_class_subjects
-        })
-
+        }
+
+
+# Compile a teachers CSV into the section-level roster the class
+# timetable uses. Reading and expansion stream one teacher at a time;
+# class teacher assignment, the extra subject and load balancing (last,
+# on section-level assignments) need the whole list and update it in
+# place. The compiled roster is cached by CSV content, so a repeat
+# upload skips the pipeline. Runs that keep a previous class teacher
+# assignment are not cached.
+def teacher_csv_to_json(
+        csv_filepath,
+        previous_class_teachers=None,
+        config=None,
+        seed=None
+    ):
+    config = config or get_school_config()
+    cache_key = None
+    if previous_class_teachers is None:
+        cache_key = teacher_roster_cache_key(csv_filepath, config, seed)
+        cached_teachers = load_teacher_roster(cache_key)
+        if cached_teachers is not None:
+            return cached_teachers
+
+    teachers = assign_class_teachers(
+        read_teachers_from_csv(csv_filepath),
+        previous_class_teachers,
+        config=config,
+        seed=seed
+    )
+    teachers = merge_other_subject_teachers(teachers)
+    teachers = assign_extra_subject_to_min_teachers(teachers, config=config)
+    expanded_teachers = redistribute_teaching_load(
+        expand_class_subjects(teachers, config=config)
+    )
+
+    if cache_key:
+        save_teacher_roster(cache_key, expanded_teachers)
     return expanded_teachers
 
 
-def teacher_csv_to_json(csv_filepath):
-    teachers = read_teachers_from_csv(csv_filepath)
-    updated_teachers = assign_class_teachers(teachers)
-    balanced_teachers = redistribute_teaching_load(updated_teachers)
-    final_teachers = merge_other_subject_teachers(balanced_teachers)
-    final_teachers = assign_extra_subject_to_min_teachers(final_teachers)
-    expanded_teachers = expand_class_subjects(final_teachers)
-    json_dump = json.dump(expanded_teachers, indent=2)
-    return json_dump
+# Build the (class, subject) -> teacher and class -> class teacher lookups
+# once per generation. The first teacher listed for a pair wins, as with
+# the linear scans these replace.
+def build_teacher_index(teachers):
+    teacher_by_class_subject = {}
+    class_teacher_by_class = {}
+    for teacher in teachers:
+        for cls, subject in teacher["class_subjects"]:
+            teacher_by_class_subject.setdefault((cls, subject), teacher)
+        if teacher["role"].startswith("class teacher of "):
+            cls = teacher["role"][len("class teacher of "):]
+            class_teacher_by_class.setdefault(cls, teacher)
+    return teacher_by_class_subject, class_teacher_by_class
+
+
+# Serialisable copy of the teacher index and the subjects per grade,
+# stored with each generated timetable so a later incremental run can
+# tell what changed. Grades are strings, as they come back from JSON.
+def build_teacher_roster(
+        teacher_by_class_subject,
+        class_teacher_by_class,
+        subjects_by_grade
+    ):
+    class_subjects = defaultdict(dict)
+    for (cls, subject), teacher in teacher_by_class_subject.items():
+        class_subjects[cls][subject] = teacher["name"]
+    return {
+        "class_teachers": {
+            cls: teacher["name"]
+            for cls, teacher in class_teacher_by_class.items()
+        },
+        "main_subjects": {
+            cls: class_main_subject(cls, class_teacher_by_class)
+            for cls in class_teacher_by_class
+        },
+        "class_subjects": dict(class_subjects),
+        "subjects_by_grade": {
+            str(grade): subjects
+            for grade, subjects in subjects_by_grade.items()
+        }
+    }
 
 
-def timetable_generation(subject_csv, teacher_csv):
-    teachers = teacher_csv_to_json(teacher_csv)
+def read_subjects_by_grade(subject_csv):
     subjects_by_grade = defaultdict(list)
     reader = csv.reader(subject_csv)
     next(reader)  # Skip header
@@ -369,163 +583,462 @@ def timetable_generation(subject_csv, teacher_csv):
         grade = int(row[0])
         subjects = [s.strip() for s in row[2:] if s.strip()]
         subjects_by_grade[grade] = subjects
+    return subjects_by_grade
 
-    # Generate all classes (1A to 10D or 1A to 10F based on section count)
-    all_classes = []
 
-    def generate_classes(grade_range=(1, 10), section_count=4):
-        sections = [chr(65 + i) for i in range(section_count)]  # 'A' -> 'D' or 'A' -> 'F'
-        return [f"{grade}{section}" for grade in range(grade_range[0], grade_range[1] + 1) for section in sections]
+# Subject the class teacher takes in the first period of every day, or
+# None for a class without a class teacher
+def class_main_subject(cls, class_teacher_by_class):
+    class_teacher = class_teacher_by_class.get(cls)
+    if class_teacher:
+        return class_teacher["class_subjects"][0][1]
+    return None
+
+
+# Fill one class's days x periods view of the class grid
+def schedule_class_week(timetable, subject_ids, grade, subjects, main_subject):
+    num_days, num_periods = timetable.shape
+
+    # Initialize timetable with class teacher's subject in first; without
+    # a class teacher the first period is left free
+    if main_subject is not None:
+        timetable[:, 0] = subject_ids.intern(main_subject)
+
+    # Collect other subjects
+    other_subjects = [subj for subj in subjects if subj != main_subject]
+
+    # Track subject counts
+    subject_counts = {subj: 0 for subj in subjects}
+    if main_subject is not None:
+        subject_counts[main_subject] = num_days  # Taught once each day
+
+    # Distribute subjects
+    for day_periods in timetable:
+        # Assign main subjects (up to 2 per day)
+        main_assigned = 0
+        for subj in other_subjects:
+            if subj in main_subjects and subject_counts.get(subj, 0) < 2 * num_days:  # 2 per day
+                for period in [1, 2]:  # Assign to first available periods after first
+                    if day_periods[period] == 0:
+                        day_periods[period] = subject_ids.intern(subj)
+                        subject_counts[subj] += 1
+                        main_assigned += 1
+                        break
+                if main_assigned >= 2:
+                    break
+
+        # Assign languages up to 5 per week
+        for subj in other_subjects:
+            if subj in languages and subject_counts.get(subj, 0) < 5:
+                for period in range(1, num_periods):
+                    if day_periods[period] == 0:
+                        day_periods[period] = subject_ids.intern(subj)
+                        subject_counts[subj] += 1
+                        break
 
-    # Example usage
-    section_count = 4  # Change to 4 or 6 dynamically
-    all_classes = generate_classes(section_count=section_count)
+        # Assign secondary subjects twice a week
+        for subj in other_subjects:
+            if subj in secondary_subjects and subject_counts.get(subj, 0) < 2:
+                for period in range(num_periods - 1, 0, -1):  # Prefer later periods
+                    if day_periods[period] == 0:
+                        day_periods[period] = subject_ids.intern(subj)
+                        subject_counts[subj] += 1
+                        break
 
-    # Step 2: Generate class timetables
-    class_timetables = defaultdict(dict)
+    # Ensure sports in the last three periods for higher classes
+    if grade >= 5 and 'Sports' in subjects:
+        sports = subject_ids.intern('Sports')
+        last_periods = range(max(num_periods - 3, 1), num_periods)
+        for day_periods in timetable:
+            sport_periods = np.flatnonzero(day_periods == sports)
+            if sport_periods.size:
+                sport_period = sport_periods[0]
+                if sport_period < last_periods[0]:  # Move to the last three
+                    day_periods[sport_period] = 0
+                    for period in last_periods:
+                        if day_periods[period] == 0:
+                            day_periods[period] = sports
+                            break
 
-    # Days of the week
-    days = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday']
 
-    for cls in all_classes:
-        grade = int(cls[:-1])
-        num_periods = 5 if grade <= 4 else 8
-        subjects = subjects_by_grade.get(grade, [])
-
-        # Get class teacher's subject
-        class_teacher = next((t for t in teachers if f"class teacher of {cls}" in t["role"]), None)
-        if class_teacher:
-            main_subject = class_teacher["class_subjects"][0][1]
-        else:
-            main_subject = ["class_subjects"][0][1]
-
-        # Initialize timetable with class teacher's subject in first
-        timetable = {day: [main_subject] + [''] * (num_periods - 1) for day in days}
-
-        # Collect other subjects
-        other_subjects = [subj for subj in subjects if subj != main_subject]
-
-        # Track subject counts
-        subject_counts = {subj: 0 for subj in subjects}
-        subject_counts[main_subject] = 6  # Taught once each day
-
-        # Define subject types
-        main_subjects = {'Mathematics', 'Science', 'Social Science','Environment Studies'}
-        languages = {'English', 'Hindi', 'Sanskrit/French'}
-        other = {'Arts', 'Health and Physical Education', 'Music', 'Sports', 'Computer Application', 'General Knowledge'}
-
-        # Distribute subjects
-        for day in days:
-            # Assign main subjects (up to 2 per day)
-            main_assigned = 0
-            for subj in other_subjects:
-                if subj in main_subjects and subject_counts.get(subj, 0) < 12:  # 2 per day * 6 days
-                    for period in [1, 2]:  # Assign to first available periods after first
-                        if timetable[day][period] == '':
-                            timetable[day][period] = subj
-                            subject_counts[subj] += 1
-                            main_assigned += 1
-                            break
-                    if main_assigned >= 2:
-                        break
+# Top up one class's Saturday with main subjects, and give the sports
+# classes the last two periods
+def adjust_saturday(
+        saturday_schedule,
+        subject_ids,
+        subjects,
+        sports_class,
+        rng=random
+    ):
+    # Count empty periods
+    empty_periods = np.flatnonzero(saturday_schedule == 0)
 
-            # Assign languages up to 5 per week
-            for subj in other_subjects:
-                if subj in languages and subject_counts.get(subj, 0) < 5:
-                    for period in range(1, num_periods):
-                        if timetable[day][period] == '':
-                            timetable[day][period] = subj
-                            subject_counts[subj] += 1
-                            break
+    # If more than one period is missing, fill with main subjects
+    if len(empty_periods) > 1:
+        saturday_subjects = [subj for subj in subjects if subj in main_subjects]
+        rng.shuffle(saturday_subjects)  # Shuffle to distribute evenly
 
-            # Assign secondary subjects twice a week
-            for subj in other_subjects:
-                if subj in other and subject_counts.get(subj, 0) < 2:
-                    for period in range(num_periods - 1, 0, -1):  # Prefer later periods
-                        if timetable[day][period] == '':
-                            timetable[day][period] = subj
-                            subject_counts[subj] += 1
-                            break
+        for i in empty_periods:
+            if saturday_subjects:
+                saturday_schedule[i] = subject_ids.intern(saturday_subjects.pop(0))
+            else:
+                break  # If all main subjects are used, stop filling
+
+    if sports_class:
+        saturday_schedule[-2:] = subject_ids.intern('Sports')
+
+
+# Book every class period with the roster teacher of its (class, subject),
+# taking that teacher's next free period on a clash. With `only`, just
+# those teachers are booked. Lessons booked away from the class's period,
+# or not at all, leave the two grids out of step and are counted as
+# unresolved conflicts. The period each lesson was booked in is kept in
+# the class grid's teacher_periods.
+def assign_teacher_periods(
+        teacher_schedules,
+        class_timetables,
+        classes,
+        roster,
+        only=None
+    ):
+    started = time.perf_counter()
+    subject_names = class_timetables.vocabulary.names
+    class_ids = teacher_schedules.vocabulary
+    unresolved = 0
+    for cls in classes:
+        class_id = class_ids.intern(cls)
+        class_subjects = roster["class_subjects"].get(cls, {})
+        booked_periods = class_timetables.teacher_period_week(cls)
+        for day_index, day_periods in enumerate(class_timetables.week(cls)):
+            for period, subject_id in enumerate(day_periods):
+                if not subject_id:
+                    continue
+                # Find the teacher for this subject and class
+                teacher = class_subjects.get(subject_names[subject_id])
+                if teacher and (only is None or teacher in only):
+                    schedule = teacher_schedules.week(teacher)[day_index]
+                    # Take this period, or on a conflict the next free one
+                    free = np.flatnonzero(schedule[period:] == 0)
+                    if free.size:
+                        schedule[period + free[0]] = class_id
+                    booked_periods[day_index, period] = (
+                        period + free[0] if free.size else -1
+                    )
+                    unresolved += not free.size or free[0] != 0
+    return {
+        "solver": "next_free_period",
+        "solve_seconds": round(time.perf_counter() - started, 4),
+        "unresolved_conflicts": int(unresolved)
+    }
 
-        # Ensure sports in periods 6-8 for higher classes
-        if grade >= 5 and 'Sports' in subjects:
-            for day in days:
-                if 'Sports' in timetable[day]:
-                    sport_period = timetable[day].index('Sports')
-                    if sport_period < 5:  # Move to 6-8
-                        timetable[day][sport_period] = ''
-                        for period in [5, 6, 7]:
-                            if timetable[day][period] == '':
-                                timetable[day][period] = 'Sports'
-                                break
 
-        class_timetables[cls] = timetable
+# Step 2 for one band of grades. Runs in a worker process in parallel
+# mode; classes don't depend on each other until teachers are booked.
+def schedule_grade_band(
+        classes,
+        subjects_by_grade,
+        main_subject_by_class,
+        config
+    ):
+    band_timetables = TimetableGrid(classes, config.days, config.max_periods)
+    for cls in classes:
+        grade = config.grade_of[cls]
+        band_timetables.set_period_count(cls, config.period_count[cls])
+        schedule_class_week(
+            band_timetables.week(cls),
+            band_timetables.vocabulary,
+            grade,
+            subjects_by_grade.get(grade, []),
+            main_subject_by_class[cls]
+        )
+    return band_timetables
 
-    class_timetable = json.dump(class_timetables, indent=2)
 
-    # Step 3: Generate teacher timetables
-    teacher_schedules = defaultdict(lambda: defaultdict(lambda: [''] * 8))
+# Split classes into up to `bands` runs of whole grades with roughly the
+# same number of classes each
+def split_grade_bands(config, bands):
+    return [
+        [cls for grade in band for cls in config.classes_by_grade[grade]]
+        for band in np.array_split(
+            config.grades,
+            min(bands, len(config.grades))
+        )
+        if band.size
+    ]
 
-    for cls in all_classes:
-        grade = int(cls[:-1])
-        num_periods = 5 if grade <= 4 else 8
-        timetable = class_timetables[cls]
-        for day in days:
-            for period in range(num_periods):
-                subject = timetable[day][period]
-                if not subject:
-                    continue
-                # Find the teacher for this subject and class
-                teacher = next((t for t in teachers if [cls, subject] in t['class_subjects']), None)
-                if teacher:
-                    teacher_name = teacher['name']
-                    if period < len(teacher_schedules[teacher_name][day]):
-                        if teacher_schedules[teacher_name][day][period] == '':
-                            teacher_schedules[teacher_name][day][period] = cls
-                        else:
-                            # Handle conflict by finding next available period
-                            for p in range(period, 8):
-                                if teacher_schedules[teacher_name][day][p] == '':
-                                    teacher_schedules[teacher_name][day][p] = cls
-                                    break
-    # Step 4: Adjust Saturday timetable
-    senior_classes = [cls for cls in all_classes if int(cls[:-1]) >= 7]  # Grades 7-10
-    random.shuffle(senior_classes)  # Randomly select 3 classes
+
+def timetable_generation(
+        subject_csv,
+        teacher_csv,
+        processes=1,
+        solver=False,
+        config=None,
+        seed=None
+    ):
+    config = config or get_school_config()
+    rng = random.Random(seed) if seed is not None else random
+    teachers = teacher_csv_to_json(teacher_csv, config=config, seed=seed)
+    teacher_by_class_subject, class_teacher_by_class = build_teacher_index(
+        teachers
+    )
+    subjects_by_grade = read_subjects_by_grade(subject_csv)
+    roster = build_teacher_roster(
+        teacher_by_class_subject,
+        class_teacher_by_class,
+        subjects_by_grade
+    )
+
+    # All classes (1A to 10D, or more sections as configured)
+    all_classes = config.classes
+
+    # Step 2: Generate class timetables, one grade band per process
+    class_timetables = TimetableGrid(
+        all_classes,
+        config.days,
+        config.max_periods
+    )
+    subject_ids = class_timetables.vocabulary
+    main_subject_by_class = {
+        cls: class_main_subject(cls, class_teacher_by_class)
+        for cls in all_classes
+    }
+    bands = split_grade_bands(config, processes)
+    if len(bands) > 1:
+        with process_pool(len(bands)) as pool:
+            band_timetables = pool.map(
+                schedule_grade_band,
+                bands,
+                repeat(subjects_by_grade),
+                repeat(main_subject_by_class),
+                repeat(config)
+            )
+            for band_timetable in band_timetables:
+                class_timetables.merge(band_timetable)
+    else:
+        class_timetables.merge(schedule_grade_band(
+            all_classes,
+            subjects_by_grade,
+            main_subject_by_class,
+            config
+        ))
+
+    # Step 3: Adjust Saturday timetable
+    senior_classes = [cls for cls in all_classes if config.grade_of[cls] >= 7]  # Grades 7-10
+    rng.shuffle(senior_classes)  # Randomly select 3 classes
     sports_classes = senior_classes[:3]
 
+    if 'saturday' in config.days:
+        saturday = config.days.index('saturday')
+        for cls in all_classes:
+            adjust_saturday(
+                class_timetables.week(cls)[saturday],
+                subject_ids,
+                subjects_by_grade[config.grade_of[cls]],
+                cls in sports_classes,
+                rng
+            )
+
+    # Step 4: Generate teacher timetables from the merged class grid
+    teacher_schedules = TimetableGrid(
+        dict.fromkeys(t["name"] for t in teachers),
+        config.days,
+        config.max_periods,
+        export_empty=False
+    )
+    book_teachers = solve_teacher_periods if solver else assign_teacher_periods
+    metrics = book_teachers(
+        teacher_schedules,
+        class_timetables,
+        all_classes,
+        roster
+    )
+    # Periods where a class ended up with two teachers at once
+    metrics["class_clashes"] = len(teacher_schedules.clashes())
+
+    # Both grids export lazily with .to_dict() / .to_json() / .to_csv()
+    return class_timetables, teacher_schedules, roster, metrics
+
+
+# Classes and teachers whose week differs from `previous`, and teachers
+# no longer scheduled at all
+def timetable_delta(previous, class_weeks, teacher_weeks):
+    return {
+        "classes": {
+            cls: week
+            for cls, week in class_weeks.items()
+            if week != previous["class_timetable"].get(cls)
+        },
+        "teachers": {
+            name: week
+            for name, week in teacher_weeks.items()
+            if week != previous["teachers_timetable"].get(name)
+        },
+        "removed_teachers": sorted(
+            set(previous["teachers_timetable"]) - set(teacher_weeks)
+        )
+    }
+
+
+# Re-generate after a teachers CSV change, starting from a previous run's
+# stored result (class_timetable, teachers_timetable and roster). Class
+# teachers are kept where they still teach the grade. Only classes whose
+# class-teacher subject changed in the stored roster are rescheduled, and
+# only teachers whose (class, subject) assignments changed or who teach a
+# rescheduled class get their week rebuilt; everything else is copied
+# from `previous`. The solver may move lessons of any class, so it
+# re-solves every teacher unless nothing changed. When the subjects per
+# grade differ from the stored ones (or `previous` predates them), every
+# class is affected, so the whole timetable is generated again. The
+# delta lists the classes and teachers whose week differs from
+# `previous`. A seed makes every random pick (new class teachers, the
+# Saturday shuffle) repeatable.
+def incremental_timetable_generation(
+        subject_csv,
+        teacher_csv,
+        previous,
+        solver=False,
+        config=None,
+        seed=None
+    ):
+    config = config or get_school_config()
+    rng = random.Random(seed) if seed is not None else random
+    previous_roster = previous["roster"]
+    subjects_by_grade = read_subjects_by_grade(subject_csv)
+    if previous_roster.get("subjects_by_grade") != {
+        str(grade): subjects for grade, subjects in subjects_by_grade.items()
+    }:
+        subject_csv.seek(0)
+        class_timetables, teacher_schedules, roster, metrics = (
+            timetable_generation(
+                subject_csv,
+                teacher_csv,
+                solver=solver,
+                config=config,
+                seed=seed
+            )
+        )
+        delta = timetable_delta(
+            previous,
+            class_timetables.to_dict(),
+            teacher_schedules.to_dict()
+        )
+        return class_timetables, teacher_schedules, roster, metrics, delta
+
+    teachers = teacher_csv_to_json(
+        teacher_csv,
+        previous_roster["class_teachers"],
+        config=config,
+        seed=seed
+    )
+    teacher_by_class_subject, class_teacher_by_class = build_teacher_index(
+        teachers
+    )
+    roster = build_teacher_roster(
+        teacher_by_class_subject,
+        class_teacher_by_class,
+        subjects_by_grade
+    )
+    all_classes = config.classes
+
+    class_timetables = TimetableGrid(
+        all_classes,
+        config.days,
+        config.max_periods
+    )
+    for cls in all_classes:
+        class_timetables.set_period_count(cls, config.period_count[cls])
+    class_timetables.load_dict(previous["class_timetable"])
+    # Results saved before teacher periods were kept can't say which
+    # period each copied lesson was booked in, so every teacher is booked
+    # again
+    rebook_all = "teacher_periods" not in previous
+    class_timetables.load_teacher_periods(previous.get("teacher_periods", {}))
+    subject_ids = class_timetables.vocabulary
+
+    changed_classes = []
     for cls in all_classes:
-        grade = int(cls[:-1])
-        num_periods = 5 if grade <= 4 else 8
-        saturday_schedule = class_timetables[cls]['saturday']
-
-        # Count empty periods
-        empty_periods = [i for i, subj in enumerate(saturday_schedule) if not subj]
-
-        # If more than one period is missing, fill with main subjects
-        if len(empty_periods) > 1:
-            main_subjects = [subj for subj in subjects_by_grade[grade] if subj in {'Mathematics', 'Science', 'Social Science', 'Environment Studies'}]
-            random.shuffle(main_subjects)  # Shuffle to distribute evenly
-
-            for i in empty_periods:
-                if main_subjects:
-                    saturday_schedule[i] = main_subjects.pop(0)
-                else:
-                    break  # If all main subjects are used, stop filling
-
-        # Assign Sports to three random senior classes in periods 7 & 8
-        if cls in sports_classes and num_periods == 8:
-            saturday_schedule[6] = 'Sports'
-            saturday_schedule[7] = 'Sports'
-
-    # Convert teacher schedules to the required format
-    formatted_teacher_timetables = {}
-    for teacher, schedule in teacher_schedules.items():
-        formatted = {}
-        for day in days:
-            periods = schedule[day][:8]  # Ensure max 8 periods
-            formatted[day] = periods
-        formatted_teacher_timetables[teacher] = formatted
-
-    teachers_timetable = json.dump(formatted_teacher_timetables, indent=2)
-
-    return class_timetable , teachers_timetable
+        main_subject = class_main_subject(cls, class_teacher_by_class)
+        previous_week = previous["class_timetable"].get(cls)
+        if previous_week and (
+            previous_roster["main_subjects"].get(cls) ==
+            roster["main_subjects"].get(cls)
+        ):
+            continue
+        grade = config.grade_of[cls]
+        timetable = class_timetables.week(cls)
+        sports_class = bool(
+            previous_week
+            and previous_week.get('saturday', [])[-2:] == ['Sports', 'Sports']
+        )
+        timetable[:] = 0
+        class_timetables.teacher_period_week(cls)[:] = -1
+        schedule_class_week(
+            timetable,
+            subject_ids,
+            grade,
+            subjects_by_grade.get(grade, []),
+            main_subject
+        )
+        if 'saturday' in config.days:
+            adjust_saturday(
+                timetable[config.days.index('saturday')],
+                subject_ids,
+                subjects_by_grade[grade],
+                sports_class,
+                rng
+            )
+        changed_classes.append(cls)
+
+    affected_teachers = (
+        {teacher["name"] for teacher in teachers} |
+        set(previous["teachers_timetable"])
+        if rebook_all
+        else set()
+    )
+    for cls in all_classes:
+        old = previous_roster["class_subjects"].get(cls, {})
+        new = roster["class_subjects"].get(cls, {})
+        for subject in old.keys() | new.keys():
+            if cls in changed_classes or old.get(subject) != new.get(subject):
+                affected_teachers.update(
+                    name
+                    for name in (old.get(subject), new.get(subject))
+                    if name
+                )
+
+    teacher_schedules = TimetableGrid(
+        dict.fromkeys(t["name"] for t in teachers),
+        config.days,
+        config.max_periods,
+        export_empty=False
+    )
+    if solver and (changed_classes or affected_teachers):
+        metrics = solve_teacher_periods(
+            teacher_schedules,
+            class_timetables,
+            all_classes,
+            roster
+        )
+    elif solver:
+        # Nothing changed, so the previous solution still holds
+        teacher_schedules.load_dict(previous["teachers_timetable"])
+        metrics = dict(previous.get("metrics", {}), solve_seconds=0.0)
+    else:
+        teacher_schedules.load_dict({
+            name: week
+            for name, week in previous["teachers_timetable"].items()
+            if name not in affected_teachers
+        })
+        metrics = assign_teacher_periods(
+            teacher_schedules,
+            class_timetables,
+            all_classes,
+            roster,
+            only=affected_teachers
+        )
+
+    metrics["class_clashes"] = len(teacher_schedules.clashes())
+
+    class_weeks = class_timetables.to_dict(None if solver else changed_classes)
+    delta = timetable_delta(previous, class_weeks, teacher_schedules.to_dict())
+    return class_timetables, teacher_schedules, roster, metrics, delta
@@ -1,10 +1,38 @@
-import csv
+import hmac
+import json
 import os
-from django.shortcuts import render
-from datetime import datetime
+from urllib.parse import urlencode
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404, render
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from datetime import date, datetime
 from education_management import settings
-from users.models import ExamTimeTable, SchoolTimeTable
-from users.utils import generate_exam_timetable, timetable_generation
+from users.attendance import (
+    class_day_records,
+    read_attendance_csv,
+    upsert_attendance
+)
+from users.attendance_rollups import (
+    class_day_attendance,
+    class_month_attendance,
+    student_attendance
+)
+from users.exam_cache import (
+    exam_timetable_cache_key,
+    get_cached_exam_timetable
+)
+from users.jobs import enqueue_timetable_job
+from users.models import (
+    ExamTimeTable,
+    JobKind,
+    SchoolTimeTable,
+    TimetableJob,
+    TimetableSlot
+)
+from users.timetable_store import get_exam_timetable_columns
 
 
 # Create your views here.
@@ -18,27 +46,47 @@ def TimeTableAgent(request):
 
 def ClassTimeTable(request):
     error_message = ""
+    job_id = ""
+    school_timetable_id = ""
     if request.method == "POST":
         try:
-            print("post method triggred")
             teachers_csv = request.FILES["teachers_csv"]
-            subject_csv = request.FILES["subject_csv"]
+            previous_timetable_id = request.POST.get("previous_timetable")
+            if previous_timetable_id:
+                # Teacher change: re-generate incrementally from an earlier
+                # timetable, reusing its subjects CSV unless a new one is sent
+                previous_timetable = SchoolTimeTable.objects.get(
+                    id=previous_timetable_id
+                )
+                subject_csv = request.FILES.get(
+                    "subject_csv",
+                    previous_timetable.subjects_csv.name
+                )
+            else:
+                previous_timetable = None
+                subject_csv = request.FILES["subject_csv"]
             if not subject_csv or not teachers_csv:
                 error_message = "Upload both the csv files"
             else:
                 schooltimetable_obj = SchoolTimeTable.objects.create(
                     subjects_csv=subject_csv,
-                    teachers_data_csv=teachers_csv
-                )
-                class_timetable, teachers_timetable = timetable_generation(
-                    schooltimetable_obj.subjects_csv,
-                    schooltimetable_obj.teachers_data_csv
+                    teachers_data_csv=teachers_csv,
+                    based_on=previous_timetable
                 )
-                print("\n\n\n\n\n class_timetable", class_timetable, teachers_timetable)
+                school_timetable_id = str(schooltimetable_obj.id)
+                job = enqueue_timetable_job(TimetableJob.objects.create(
+                    kind=JobKind.CLASS,
+                    school_timetable=schooltimetable_obj
+                ))
+                job_id = str(job.id)
+        except (SchoolTimeTable.DoesNotExist, ValidationError):
+            error_message = "Previous timetable not found"
         except Exception as e:
             error_message = str(e)
     context = {
-        "error_message": error_message
+        "error_message": error_message,
+        "job_id": job_id,
+        "school_timetable_id": school_timetable_id
     }
     return render(request, 'ClassTimeTable.html', context)
 
@@ -47,6 +95,11 @@ def ExamTimeTableView(request):
     error_message = ""
     generated_csv_path = ""
     timetable_data = ""
+    job_id = ""
+    exam_timetable_id = ""
+    filters = {}
+    choices = {}
+    page = None
     if request.method == "POST":
         try:
             start_date_str = request.POST.get("start-date")
@@ -64,34 +117,211 @@ def ExamTimeTableView(request):
             if not csv_file.name.endswith('.csv'):
                 error_message = 'File is not CSV type'
             else:
-                exam_timetable_obj = ExamTimeTable.objects.create(
-                    start_date=start_date,
-                    end_date=end_date,
-                    uploaded_csv=csv_file
-                )
-                generated_csv_path = generate_exam_timetable(
-                    exam_timetable_obj.uploaded_csv,
+                cache_key = exam_timetable_cache_key(
+                    csv_file,
                     start_date_str,
-                    end_date_str
+                    end_date_str,
+                    settings.EXAM_TIMETABLE_SEED
                 )
-                exam_timetable_obj.generated_timetable_csv = generated_csv_path
-                exam_timetable_obj.save()
+                exam_timetable_obj = get_cached_exam_timetable(cache_key)
+                if exam_timetable_obj:
+                    exam_timetable_id = str(exam_timetable_obj.id)
+                    generated_csv_path = (
+                        exam_timetable_obj.generated_timetable_csv.name
+                    )
+                else:
+                    exam_timetable_obj = ExamTimeTable.objects.create(
+                        start_date=start_date,
+                        end_date=end_date,
+                        uploaded_csv=csv_file,
+                        cache_key=cache_key,
+                        schedule_options={
+                            "seed": settings.EXAM_TIMETABLE_SEED
+                        }
+                    )
+                    job = enqueue_timetable_job(TimetableJob.objects.create(
+                        kind=JobKind.EXAM,
+                        exam_timetable=exam_timetable_obj
+                    ))
+                    job_id = str(job.id)
+        except Exception as e:
+            error_message = str(e)
+    elif request.GET.get("exam_timetable"):
+        # Finished background job: show the stored timetable
+        try:
+            exam_timetable_obj = ExamTimeTable.objects.get(
+                id=request.GET["exam_timetable"]
+            )
+            exam_timetable_id = str(exam_timetable_obj.id)
+            generated_csv_path = (
+                exam_timetable_obj.generated_timetable_csv.name or ""
+            )
+        except (ExamTimeTable.DoesNotExist, ValidationError):
+            error_message = "Exam timetable not found"
 
-                with open(os.path.join(settings.MEDIA_ROOT, generated_csv_path), 'r') as f:
-                    reader = csv.DictReader(f)
-                    timetable_data = list(reader)
-                print(timetable_data)
+    if generated_csv_path:
+        # Only the requested page of the (optionally filtered) timetable
+        # is turned into rows for the template
+        try:
+            columns = get_exam_timetable_columns(
+                os.path.join(settings.MEDIA_ROOT, generated_csv_path)
+            )
+            for column in ("Class", "Date", "Subject"):
+                choices[column.lower()] = columns.choices(column)
+                if request.GET.get(column.lower()):
+                    filters[column] = request.GET[column.lower()]
+            page = Paginator(
+                columns.filter(filters),
+                settings.EXAM_TIMETABLE_PAGE_SIZE
+            ).get_page(request.GET.get("page"))
+            timetable_data = columns.rows(page.object_list)
         except Exception as e:
             error_message = str(e)
-    print("generated_csv_path", generated_csv_path)
+    filters = {column.lower(): value for column, value in filters.items()}
     context = {
         "error_message": error_message,
         "generated_csv_path": generated_csv_path,
-        "timetable_data": timetable_data
+        "timetable_data": timetable_data,
+        "job_id": job_id,
+        "exam_timetable_id": exam_timetable_id,
+        "page": page,
+        "filters": filters,
+        "choices": choices,
+        "page_query": urlencode(
+            dict(filters, exam_timetable=exam_timetable_id)
+        )
     }
     return render(request, 'ExamTimeTable.html', context)
 
 
+# Polled by the timetable pages while a background job runs
+def TimetableJobStatus(request, job_id):
+    job = get_object_or_404(TimetableJob, id=job_id)
+    return JsonResponse({
+        "id": str(job.id),
+        "kind": job.kind,
+        "status": job.status,
+        "error_message": job.error_message,
+        "result": job.result
+    })
+
+
+# Saved slots of a generated class timetable, filtered by any of
+# ?teacher=, ?class=, ?day= and ?period=, e.g. what a teacher is doing
+# on Tuesday period 3
+def TimetableSlots(request, school_timetable_id):
+    school_timetable = get_object_or_404(
+        SchoolTimeTable,
+        id=school_timetable_id
+    )
+    slots = TimetableSlot.objects.filter(school_timetable=school_timetable)
+    # With a teacher, periods are the teacher's own (teacher_period), so
+    # the answer matches their timetable
+    period_field = "period"
+    if request.GET.get("teacher"):
+        slots = slots.filter(teacher=request.GET["teacher"])
+        period_field = "teacher_period"
+    if request.GET.get("class"):
+        slots = slots.filter(class_name=request.GET["class"])
+    if request.GET.get("day"):
+        slots = slots.filter(day=request.GET["day"].lower())
+    if request.GET.get("period"):
+        if not request.GET["period"].isdigit():
+            return JsonResponse({"error": "period must be a number"}, status=400)
+        slots = slots.filter(**{period_field: int(request.GET["period"])})
+    rows = list(slots.order_by("class_name", "day", period_field).values(
+        "class_name",
+        "day",
+        "period",
+        "subject",
+        "teacher",
+        "teacher_period"
+    ))
+    return JsonResponse({
+        "school_timetable": str(school_timetable.id),
+        "slots": rows
+    })
+
+
+# Bulk attendance upload. Either a CSV under "csv-upload" with
+# class_id, roll_number, date_of_attendance and is_present columns, or a
+# JSON class-day {"class_id", "date", "present": [roll numbers]} where
+# every other student of the class is marked absent.
+#
+# The callers are school systems, not browsers, so there is no session
+# or CSRF token: they authenticate with the ATTENDANCE_API_TOKEN bearer
+# token instead, which a browser never sends on its own.
+@csrf_exempt
+@require_POST
+def AttendanceUpload(request):
+    if not _has_attendance_token(request):
+        return JsonResponse(
+            {"error": "A valid attendance API token is required"},
+            status=401
+        )
+    errors = []
+    try:
+        if "csv-upload" in request.FILES:
+            csv_file = request.FILES["csv-upload"]
+            if not csv_file.name.endswith(".csv"):
+                return JsonResponse(
+                    {"error": "File is not CSV type"},
+                    status=400
+                )
+            records = read_attendance_csv(csv_file, errors)
+        else:
+            class_day = json.loads(request.body)
+            records = class_day_records(
+                class_day["class_id"],
+                date.fromisoformat(class_day["date"]),
+                class_day.get("present", [])
+            )
+        report = upsert_attendance(records)
+    except Exception as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    report["skipped"] = len(errors)
+    report["errors"] = [
+        {"line": line, "error": message}
+        for line, message in errors[:settings.ATTENDANCE_ERRORS_SHOWN]
+    ]
+    return JsonResponse(report)
+
+
+def _has_attendance_token(request):
+    token = settings.ATTENDANCE_API_TOKEN
+    scheme, _, given = request.headers.get("Authorization", "").partition(" ")
+    return bool(token) and scheme.lower() == "bearer" and hmac.compare_digest(
+        given.encode(), token.encode()
+    )
+
+
+# Attendance dashboards, served from the rollup tables:
+# ?class_id=&date=YYYY-MM-DD for one class-day, ?class_id=&month=YYYY-MM
+# for a class's month by day, ?student_id=[&month=YYYY-MM] for a student
+def AttendanceSummary(request):
+    try:
+        month = request.GET.get("month")
+        if month:
+            month = datetime.strptime(month, "%Y-%m").date()
+        if request.GET.get("student_id"):
+            summary = student_attendance(request.GET["student_id"], month)
+        elif request.GET.get("class_id") and request.GET.get("date"):
+            summary = class_day_attendance(
+                request.GET["class_id"],
+                date.fromisoformat(request.GET["date"])
+            )
+        elif request.GET.get("class_id") and month:
+            summary = class_month_attendance(request.GET["class_id"], month)
+        else:
+            return JsonResponse(
+                {"error": "Give student_id, or class_id with date or month"},
+                status=400
+            )
+    except (ValueError, ValidationError) as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    return JsonResponse({"attendance": summary})
+
+
 def EduHelper(request):
     try:
         context = {}